@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Multi-worker Benchmark for Weather & Air Quality Planner
+
+Runs N worker processes that each replay the same tool-call workload through
+MCPServer, with a fake MCP client standing in for the Node server (fixed
+upstream latency, realistic payload in an MCP text envelope). Every call,
+cache hit or not, also does the CPU work the agent does with a result:
+decode the envelope, validate the hourly rows and serialize the response
+for the model. That work, not the simulated latency, dominates, so calls/s
+only scales with workers up to the number of cores. Compares:
+- shared:  all workers use one SQLite tool cache (python serve.py)
+- private: every worker has its own cache (one `adk web` per worker)
+
+Reports calls/sec and how many calls actually reached the upstream client.
+
+Usage:
+    python bench_workers.py --calls 400 --cities 20 --latency 0.01
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import multiprocessing as mp
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CITIES = [
+    "Kathmandu", "London", "Paris", "New York", "Tokyo", "Delhi", "Sydney", "Berlin",
+    "Madrid", "Rome", "Cairo", "Lagos", "Lima", "Toronto", "Seoul", "Bangkok",
+    "Nairobi", "Oslo", "Dubai", "Mexico City", "Pokhara", "Lalitpur", "Mumbai", "Beijing",
+]
+
+
+def forecast_payload() -> Dict[str, Any]:
+    return {
+        "source": "open-meteo",
+        "generated_at": "2025-01-15T00:00:00Z",
+        "hourly": [
+            {"time": f"2025-01-{15 + h // 24}T{h % 24:02d}:00:00.000Z", "temp": 12.5 + h % 7,
+             "precip_mm": 0, "wind_kph": 7.2}
+            for h in range(168)
+        ],
+        "daily": [
+            {"date": f"2025-01-{15 + d}", "tmin": 8.1, "tmax": 19.4, "precip_mm": 0}
+            for d in range(7)
+        ],
+    }
+
+
+def process_result(result: Dict[str, Any]) -> int:
+    """CPU work per call: decode, validate and re-serialize the forecast for the model."""
+    payload = json.loads(result["content"][0]["text"])
+    for hour in payload["hourly"]:
+        if not (-90 <= hour["temp"] <= 60 and hour["wind_kph"] >= 0 and hour["precip_mm"] >= 0):
+            raise ValueError(f"Invalid hour {hour['time']}")
+    return len(json.dumps({"name": "get_weather", "response": payload}))
+
+
+class FakeMCPClient:
+    """Stands in for MCPClient: sleeps for the upstream latency and counts calls."""
+
+    def __init__(self, counter, latency: float):
+        self.counter = counter
+        self.latency = latency
+
+    def call_tool(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        with self.counter.get_lock():
+            self.counter.value += 1
+        time.sleep(self.latency)
+        return {"content": [{"type": "text", "text": json.dumps(forecast_payload())}]}
+
+
+def worker(worker_id, cache_path, counter, barrier, results, calls, cities, latency, cpu_work):
+    from weather_agent.agent import MCPServer
+    from weather_agent.tool_cache import SharedToolCache
+
+    mcp = MCPServer(client=FakeMCPClient(counter, latency), cache=SharedToolCache(cache_path))
+    rng = random.Random(worker_id)
+    workload = [rng.choice(cities) for _ in range(calls)]
+
+    async def run():
+        for city in workload:
+            result = await mcp.get_weather(city, "2025-01-15", "2025-01-21")
+            for _ in range(cpu_work):
+                process_result(result)
+
+    barrier.wait()
+    start = time.perf_counter()
+    asyncio.run(run())
+    results.put(time.perf_counter() - start)
+
+
+def run_mode(mode: str, workers: int, calls: int, cities: List[str], latency: float, cpu_work: int,
+             tmpdir: str):
+    counter = mp.Value("i", 0)
+    barrier = mp.Barrier(workers)
+    results = mp.Queue()
+    procs = []
+    for i in range(workers):
+        name = "shared" if mode == "shared" else f"private-{i}"
+        cache_path = os.path.join(tmpdir, f"{mode}-{workers}-{name}.db")
+        p = mp.Process(target=worker, args=(i, cache_path, counter, barrier, results, calls, cities, latency,
+                                                cpu_work))
+        p.start()
+        procs.append(p)
+    elapsed = max(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return {
+        "mode": mode,
+        "workers": workers,
+        "calls": workers * calls,
+        "seconds": elapsed,
+        "calls_per_sec": workers * calls / elapsed,
+        "upstream": counter.value,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared vs private tool caches across workers.")
+    parser.add_argument("--calls", type=int, default=400, help="Tool calls per worker")
+    parser.add_argument("--cities", type=int, default=20, help="Distinct locations in the workload")
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated upstream latency (seconds)")
+    parser.add_argument("--cpu-work", type=int, default=20,
+                        help="Times each result is decoded/validated/serialized (~0.4 ms each)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cities = CITIES[: args.cities]
+    counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"{os.cpu_count()} CPU cores\n")
+    print(f"{'mode':<8} {'workers':>7} {'calls':>7} {'seconds':>8} {'calls/s':>9} {'upstream':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in counts:
+            for mode in ("private", "shared"):
+                r = run_mode(mode, n, args.calls, cities, args.latency, args.cpu_work, tmpdir)
+                print(f"{r['mode']:<8} {r['workers']:>7} {r['calls']:>7} {r['seconds']:>8.2f} "
+                      f"{r['calls_per_sec']:>9.0f} {r['upstream']:>9}")
+    print(f"\n{len(cities)} distinct locations; ideal upstream count is {len(cities)} per run.")
+
+
+if __name__ == "__main__":
+    main()
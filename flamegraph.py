@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Flamegraph Converter for Weather & Air Quality Planner profiles
+
+Turns the profiles written in profiling mode into folded stacks
+("frame;frame;frame weight" lines), the input format of flamegraph.pl,
+inferno and speedscope:
+- <tool>-<pid>-<n>.cpuprofile   (MCP_PROFILE_DIR, Node CPU samples, weight = µs)
+- <tool>-<pid>-<n>.heapprofile  (MCP_PROFILE_DIR, Node allocations, weight = bytes)
+- <tool>-<pid>-<n>.pstats       (WEATHER_AGENT_PROFILE_DIR, Python cProfile, weight = µs)
+
+Each input gets a <input>.folded file next to it; with --svg, <input>.svg is
+rendered too if flamegraph.pl or inferno-flamegraph is on PATH.
+
+Usage:
+    python flamegraph.py profiles/                  # every profile in a directory
+    python flamegraph.py profiles/get_weather-*.cpuprofile --svg
+"""
+
+import os
+import sys
+import json
+import glob
+import shutil
+import pstats
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+EXTENSIONS = (".cpuprofile", ".heapprofile", ".pstats")
+MAX_DEPTH = 64
+
+
+def _frame_name(call_frame: Dict) -> str:
+    name = call_frame.get("functionName") or "(anonymous)"
+    url = call_frame.get("url") or ""
+    if url:
+        return f"{name} ({os.path.basename(url)}:{call_frame.get('lineNumber', 0) + 1})"
+    return name
+
+
+def fold_cpuprofile(profile: Dict) -> Counter:
+    """Fold a V8 .cpuprofile, weighting each sample by its time delta (µs)."""
+    nodes = {node["id"]: node for node in profile["nodes"]}
+    parents = {}
+    for node in profile["nodes"]:
+        for child in node.get("children", []):
+            parents[child] = node["id"]
+
+    weights: Counter = Counter()
+    for node_id, delta in zip(profile.get("samples", []), profile.get("timeDeltas", [])):
+        weights[node_id] += max(delta, 0)
+
+    folded: Counter = Counter()
+    for node_id, weight in weights.items():
+        stack = []
+        current = node_id
+        while current is not None:
+            name = nodes[current]["callFrame"].get("functionName")
+            if name != "(root)":
+                stack.append(_frame_name(nodes[current]["callFrame"]))
+            current = parents.get(current)
+        if stack and weight:
+            folded[";".join(reversed(stack))] += weight
+    return folded
+
+
+def fold_heapprofile(profile: Dict) -> Counter:
+    """Fold a V8 sampling heap profile, weighting frames by allocated bytes."""
+    folded: Counter = Counter()
+
+    def walk(node: Dict, stack: List[str]):
+        name = node["callFrame"].get("functionName")
+        if name != "(root)":
+            stack = stack + [_frame_name(node["callFrame"])]
+        if node.get("selfSize") and stack:
+            folded[";".join(stack)] += node["selfSize"]
+        for child in node.get("children", []):
+            walk(child, stack)
+
+    walk(profile["head"], [])
+    return folded
+
+
+def fold_pstats(path: str) -> Counter:
+    """Approximate folded stacks from cProfile's caller/callee totals.
+
+    cProfile keeps only one level of caller information, so each function's
+    time is split between its callers in proportion to the cumulative time
+    each caller spent in it.
+    """
+    stats = pstats.Stats(path).stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[Tuple, List[Tuple[Tuple, float]]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            callees[caller].append((func, caller_stats[3]))
+
+    def label(func: Tuple) -> str:
+        filename, line, name = func
+        if filename == "~":
+            return name
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    folded: Counter = Counter()
+
+    def walk(func: Tuple, stack: List[str], seen: frozenset, scale: float):
+        _, _, tt, ct, _ = stats[func]
+        stack = stack + [label(func)]
+        weight = int(tt * scale * 1e6)
+        if weight:
+            folded[";".join(stack)] += weight
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            total = stats[callee][3]
+            if callee in seen or not total:
+                continue
+            walk(callee, stack, seen | {callee}, scale * edge_ct / total)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    for root in roots:
+        walk(root, [], frozenset([root]), 1.0)
+    return folded
+
+
+def fold_file(path: str) -> Counter:
+    if path.endswith(".pstats"):
+        return fold_pstats(path)
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    if path.endswith(".heapprofile"):
+        return fold_heapprofile(profile)
+    return fold_cpuprofile(profile)
+
+
+def write_folded(folded: Counter, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, weight in sorted(folded.items()):
+            f.write(f"{stack} {weight}\n")
+
+
+def render_svg(folded_path: str, svg_path: str, title: str) -> bool:
+    tool = shutil.which("flamegraph.pl") or shutil.which("inferno-flamegraph")
+    if tool is None:
+        return False
+    with open(folded_path, "rb") as src, open(svg_path, "wb") as dst:
+        subprocess.run([tool, "--title", title], stdin=src, stdout=dst, check=True)
+    return True
+
+
+def collect_inputs(paths: List[str]) -> List[str]:
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            inputs.extend(sorted(p for p in glob.glob(os.path.join(path, "*")) if p.endswith(EXTENSIONS)))
+        else:
+            inputs.extend(glob.glob(path) or [path])
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert profiles to folded stacks / flamegraphs.")
+    parser.add_argument("paths", nargs="+", help="Profile files or directories")
+    parser.add_argument("--svg", action="store_true", help="Render SVGs with flamegraph.pl or inferno")
+    args = parser.parse_args()
+
+    inputs = collect_inputs(args.paths)
+    if not inputs:
+        print("No .cpuprofile, .heapprofile or .pstats files found.")
+        return 1
+
+    missing_renderer = False
+    for path in inputs:
+        folded = fold_file(path)
+        folded_path = path + ".folded"
+        write_folded(folded, folded_path)
+        print(f"{path} -> {folded_path} ({len(folded)} stacks)")
+        if args.svg and not render_svg(folded_path, path + ".svg", os.path.basename(path)):
+            missing_renderer = True
+
+    if missing_renderer:
+        print("flamegraph.pl / inferno-flamegraph not found; open the .folded files in https://www.speedscope.app")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,18 +12,32 @@ import {
 
 const API_URL = '/run';
 const SESSION_API_BASE = '/apps/weather_agent/users';
+// The server keeps the full session; localStorage only needs enough to redraw the chat
+const MAX_STORED_MESSAGES = 50;
+const PERSIST_DELAY_MS = 500;
+// Messages sent within this window go to the agent as one request
+const SEND_DEBOUNCE_MS = 300;
+// An immediate identical resend is answered from memory within the server's tool dedup window
+const RESPONSE_CACHE_TTL_MS = 60000;
+// Alerts are appended to the session by the server, outside of any /run response
+const ALERT_POLL_MS = 30000;
+const ALERT_PREFIX = '⚠️ Alert';
 
 function App() {
   const [messages, setMessages] = useState([]);
   const [messageInput, setMessageInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
-  const [sessionId, setSessionId] = useState(null);
-  const [userId, setUserId] = useState(null);
   const [isSessionReady, setIsSessionReady] = useState(false);
   const hasInitialized = useRef(false);
   const messageListRef = useRef(null);
   const scrollableElementRef = useRef(null);
   const inputRef = useRef(null); // Used in paste handler
+  const sessionRef = useRef(null); // Promise of { sessionId, userId }; sends wait on it
+  const inFlightRef = useRef(null); // AbortController of the request in flight
+  const pendingRef = useRef([]); // Messages waiting out the debounce or the turn in flight
+  const debounceRef = useRef(null);
+  const lastResponseRef = useRef(null); // { key, data, at } of the last answered message
+  const seenAlertsRef = useRef(new Set(JSON.parse(localStorage.getItem('chat_seen_alerts') || '[]'))); // Event ids already shown
 
   // Scroll to bottom
   const scrollToBottom = () => {
@@ -47,7 +61,7 @@ function App() {
     }
   };
 
-  const getTime = () => new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+  const getTime = (date = new Date()) => date.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
 
   // Save session to localStorage
   const saveSessionToStorage = (sid, uid, msgs = null) => {
@@ -71,8 +85,7 @@ function App() {
     const savedMessages = localStorage.getItem('chat_messages');
     
     if (savedSessionId && savedUserId) {
-      setSessionId(savedSessionId);
-      setUserId(savedUserId);
+      sessionRef.current = Promise.resolve({ sessionId: savedSessionId, userId: savedUserId });
       setIsSessionReady(true);
       if (savedMessages) {
         try {
@@ -93,8 +106,13 @@ function App() {
     return false;
   };
 
-  // Initialize session
-  const createSession = async (clearMessages = false) => {
+  // Initialize session; messages sent meanwhile wait for it instead of racing it
+  const createSession = (clearMessages = false) => {
+    sessionRef.current = requestSession(clearMessages);
+    return sessionRef.current;
+  };
+
+  const requestSession = async (clearMessages) => {
     const newSessionId = `s_${Date.now()}_${Math.random().toString(36).slice(2, 9)}`;
     const newUserId = `u_${Date.now()}_${Math.random().toString(36).slice(2, 9)}`;
 
@@ -106,8 +124,6 @@ function App() {
       });
       const data = await res.json();
       const id = data.id || newSessionId;
-      setSessionId(id);
-      setUserId(newUserId);
       setIsSessionReady(true);
       
       if (clearMessages) {
@@ -127,19 +143,21 @@ function App() {
         saveSessionToStorage(id, newUserId);
       }
       
-      return true;
+      return { sessionId: id, userId: newUserId };
     } catch (err) {
       console.error('Session error:', err);
-      setSessionId(newSessionId);
-      setUserId(newUserId);
       setIsSessionReady(true);
       saveSessionToStorage(newSessionId, newUserId);
-      return false;
+      return { sessionId: newSessionId, userId: newUserId };
     }
   };
 
   // Clear session and create new one
   const handleNewSession = async () => {
+    cancelPending();
+    lastResponseRef.current = null;
+    seenAlertsRef.current = new Set();
+    localStorage.removeItem('chat_seen_alerts');
     localStorage.removeItem('chat_session_id');
     localStorage.removeItem('chat_user_id');
     localStorage.removeItem('chat_messages');
@@ -280,6 +298,47 @@ function App() {
     };
   }, [messageInput]);
 
+  // Persist recent messages once per burst of updates instead of on every message
+  useEffect(() => {
+    if (!isSessionReady) return;
+    const timer = setTimeout(() => {
+      localStorage.setItem('chat_messages', JSON.stringify(messages.slice(-MAX_STORED_MESSAGES)));
+    }, PERSIST_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [messages, isSessionReady]);
+
+  // Poll the session for alert messages the server appended since the last check
+  useEffect(() => {
+    if (!isSessionReady) return;
+    const poll = async () => {
+      if (document.hidden) return;
+      const current = sessionRef.current;
+      try {
+        const session = await current;
+        const res = await fetch(`${SESSION_API_BASE}/${session.userId}/sessions/${session.sessionId}`);
+        if (!res.ok || sessionRef.current !== current) return;
+        const { events = [] } = await res.json();
+        const alerts = events.filter((e) =>
+          e.content?.parts?.[0]?.text?.startsWith(ALERT_PREFIX) && !seenAlertsRef.current.has(e.id));
+        if (alerts.length === 0) return;
+        alerts.forEach((e) => seenAlertsRef.current.add(e.id));
+        localStorage.setItem('chat_seen_alerts', JSON.stringify([...seenAlertsRef.current]));
+        setMessages((m) => [...m, ...alerts.map((e) => ({
+          message: e.content.parts[0].text,
+          sender: 'Assistant',
+          direction: 'incoming',
+          timestamp: getTime(new Date(e.timestamp * 1000))
+        }))]);
+      } catch (e) {
+        console.error('Alert poll error:', e);
+      }
+    };
+    poll();
+    const timer = setInterval(poll, ALERT_POLL_MS);
+    return () => clearInterval(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isSessionReady]);
+
   // Auto-scroll
   useLayoutEffect(scrollToBottom, [messages.length, isLoading]);
   useEffect(() => {
@@ -289,6 +348,21 @@ function App() {
     return () => observer.disconnect();
   }, []);
 
+  // Drop queued messages and abort the request in flight (new session, unmount)
+  const cancelPending = () => {
+    clearTimeout(debounceRef.current);
+    pendingRef.current = [];
+    if (inFlightRef.current) {
+      inFlightRef.current.abort();
+      inFlightRef.current = null;
+    }
+    setIsLoading(false);
+  };
+
+  // Abort anything still in flight when the app unmounts
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  useEffect(() => cancelPending, []);
+
   // Process backend response
   const processResponse = (data) => {
     if (data === null || data === undefined) {
@@ -326,41 +400,63 @@ function App() {
       direction: 'incoming',
       timestamp: getTime()
     };
-    setMessages((m) => {
-      const updated = [...m, msg];
-      // Save messages to localStorage
-      localStorage.setItem('chat_messages', JSON.stringify(updated));
-      return updated;
-    });
+    setMessages((m) => [...m, msg]);
   };
 
-  const sendMessage = async () => {
-    if (!messageInput.trim() || !isSessionReady || isLoading) return;
-
+  const sendMessage = () => {
     const input = messageInput.trim();
+    if (!input) return;
+
     const userMsg = { message: input, sender: 'User', direction: 'outgoing', timestamp: getTime() };
-    setMessages((m) => {
-      const updated = [...m, userMsg];
-      // Save messages to localStorage
-      localStorage.setItem('chat_messages', JSON.stringify(updated));
-      return updated;
-    });
+    setMessages((m) => [...m, userMsg]);
     setMessageInput('');
     setIsLoading(true);
     scrollToBottom();
 
+    // Queue behind the turn in flight rather than abort it: the server has
+    // already stored that message, so re-sending it would duplicate it
+    pendingRef.current.push(input);
+    clearTimeout(debounceRef.current);
+    debounceRef.current = setTimeout(flushPending, SEND_DEBOUNCE_MS);
+  };
+
+  // Send everything queued as one request, unless a turn is still in flight
+  const flushPending = () => {
+    if (inFlightRef.current || pendingRef.current.length === 0) return;
+    dispatchMessage(pendingRef.current.splice(0).join('\n'));
+  };
+
+  const dispatchMessage = async (input) => {
+    const controller = new AbortController();
+    inFlightRef.current = controller;
+
     try {
+      const session = await sessionRef.current;
+      // New session started while waiting for this one
+      if (controller.signal.aborted) return;
+
+      // Only a resend of the message just answered is served locally; anything
+      // else may depend on the conversation so far and goes to the agent
+      const cacheKey = `${session.sessionId}:${input.toLowerCase().replace(/\s+/g, ' ')}`;
+      const last = lastResponseRef.current;
+      if (last && last.key === cacheKey && Date.now() - last.at < RESPONSE_CACHE_TTL_MS) {
+        processResponse(last.data);
+        return;
+      }
+      lastResponseRef.current = null;
+
       const req = {
         app_name: 'weather_agent',
-        user_id: userId,
-        session_id: sessionId,
+        user_id: session.userId,
+        session_id: session.sessionId,
         new_message: { role: 'user', parts: [{ text: input }] }
       };
 
       const res = await fetch(API_URL, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(req)
+        body: JSON.stringify(req),
+        signal: controller.signal
       });
 
       if (!res.ok) {
@@ -375,8 +471,12 @@ function App() {
         }
         throw new Error(errorMsg);
       }
-      processResponse(await res.json());
+      const data = await res.json();
+      lastResponseRef.current = { key: cacheKey, data, at: Date.now() };
+      processResponse(data);
     } catch (e) {
+      // Cancelled by a new session or unmount
+      if (e.name === 'AbortError') return;
       console.error('Send error:', e);
       
       let errorMessageText = "I'm having trouble processing your request right now. Please try again later.";
@@ -393,19 +493,18 @@ function App() {
         }
       }
       
-      setMessages((m) => {
-        const updated = [...m, {
-          message: errorMessageText,
-          sender: 'Assistant',
-          direction: 'incoming',
-          timestamp: getTime()
-        }];
-        // Save messages to localStorage
-        localStorage.setItem('chat_messages', JSON.stringify(updated));
-        return updated;
-      });
+      setMessages((m) => [...m, {
+        message: errorMessageText,
+        sender: 'Assistant',
+        direction: 'incoming',
+        timestamp: getTime()
+      }]);
     } finally {
-      setIsLoading(false);
+      if (inFlightRef.current === controller) {
+        inFlightRef.current = null;
+        if (pendingRef.current.length === 0) setIsLoading(false);
+        else flushPending();
+      }
     }
   };
 
@@ -550,7 +649,6 @@ function App() {
                 onClick={handleNewSession}
                 className="new-session-button"
                 title="Start New Session"
-                disabled={isLoading}
               >
                 New Session
               </button>
@@ -603,7 +701,6 @@ function App() {
 
           <MessageInput
             placeholder={isSessionReady ? "Ask about weather or air quality..." : "Initializing session..."}
-            disabled={isLoading || !isSessionReady}
             onSend={sendMessage}
             onChange={setMessageInput}
             value={messageInput}
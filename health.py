@@ -137,13 +137,8 @@ async def check_mcp_server() -> Dict[str, Any]:
     }
     
     try:
-        # Check if MCP client module exists
-        agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "agent"))
-        if agent_dir not in sys.path:
-            sys.path.insert(0, agent_dir)
-        
         try:
-            from mcp_client import MCPClient  # type: ignore
+            from weather_agent.mcp_client import MCPClient
             
             # Try to initialize and call a tool
             client = MCPClient()
@@ -11,6 +11,10 @@ import {
 import fetch from 'node-fetch';
 import { fileURLToPath } from 'url';
 import { dirname, join } from 'path';
+import { mkdirSync, writeFileSync } from 'fs';
+import { AsyncLocalStorage } from 'async_hooks';
+import { performance } from 'perf_hooks';
+import inspector from 'inspector';
 import dotenv from 'dotenv';
 
 const __filename = fileURLToPath(import.meta.url);
@@ -50,6 +54,101 @@ function setCache(key, data) {
   cache.set(key, { data, timestamp: Date.now() });
 }
 
+// Profiling mode (enabled by MCP_PROFILE_DIR)
+// Samples CPU and heap allocations while tool calls are running and writes
+// <tools>-<pid>-<n>.cpuprofile / .heapprofile files whenever the server goes
+// idle. Per-call phase timings are logged to stderr. Convert the profiles
+// with `python flamegraph.py <dir>`.
+const PROFILE_DIR = process.env.MCP_PROFILE_DIR;
+// Profile files are only labelled with known tool names; the raw request name is untrusted
+const PROFILED_TOOLS = new Set(['get_weather', 'get_air_quality']);
+const callContext = new AsyncLocalStorage();
+
+function createProfiler(dir) {
+  mkdirSync(dir, { recursive: true });
+  const session = new inspector.Session();
+  session.connect();
+  const post = (method, params = {}) => new Promise((resolve, reject) => {
+    session.post(method, params, (err, result) => (err ? reject(err) : resolve(result)));
+  });
+
+  let active = null; // { starting, tools, inFlight }
+  let seq = 0;
+
+  function begin(tool) {
+    if (!active) {
+      active = {
+        tools: new Set(),
+        inFlight: 0,
+        starting: (async () => {
+          await post('Profiler.enable');
+          await post('Profiler.setSamplingInterval', { interval: 100 }); // µs
+          await post('Profiler.start');
+          await post('HeapProfiler.enable');
+          await post('HeapProfiler.startSampling', { samplingInterval: 4096 }); // bytes
+        })(),
+      };
+    }
+    active.tools.add(tool);
+    active.inFlight++;
+    return active;
+  }
+
+  async function end(window) {
+    window.inFlight--;
+    if (window.inFlight > 0 || active !== window) return;
+    active = null;
+    // Post both stops before yielding so a call starting meanwhile opens a fresh window
+    const [cpu, heap] = await Promise.allSettled([
+      post('Profiler.stop'),
+      post('HeapProfiler.stopSampling'),
+    ]);
+    if (cpu.status === 'rejected' || heap.status === 'rejected') return; // profiler never started
+    const { profile } = cpu.value;
+    const { profile: heapProfile } = heap.value;
+    const base = join(dir, `${[...window.tools].sort().join('+')}-${process.pid}-${++seq}`);
+    writeFileSync(`${base}.cpuprofile`, JSON.stringify(profile));
+    writeFileSync(`${base}.heapprofile`, JSON.stringify(heapProfile));
+  }
+
+  async function run(name, fn) {
+    const tool = PROFILED_TOOLS.has(name) ? name : 'unknown';
+    const window = begin(tool);
+    const call = { phases: {}, start: performance.now(), heapBefore: process.memoryUsage().heapUsed };
+    try {
+      // A profiler that fails to start must not fail (or wedge) the tool call
+      await window.starting.catch((err) => console.error(`Profiler start failed: ${err.message}`));
+      return await callContext.run(call, fn);
+    } finally {
+      console.error(JSON.stringify({
+        tool,
+        profile: {
+          total_ms: +(performance.now() - call.start).toFixed(3),
+          phases_ms: Object.fromEntries(Object.entries(call.phases).map(([k, v]) => [k, +v.toFixed(3)])),
+          heap_delta_bytes: process.memoryUsage().heapUsed - call.heapBefore,
+        },
+      }));
+      await end(window);
+    }
+  }
+
+  return { run };
+}
+
+const profiler = PROFILE_DIR ? createProfiler(PROFILE_DIR) : null;
+
+// Time a synchronous section of the current tool call (no-op unless profiling)
+function measure(phase, fn) {
+  const call = profiler && callContext.getStore();
+  if (!call) return fn();
+  const start = performance.now();
+  try {
+    return fn();
+  } finally {
+    call.phases[phase] = (call.phases[phase] || 0) + performance.now() - start;
+  }
+}
+
 // Retry with exponential backoff
 async function fetchWithRetry(url, options = {}, maxRetries = 3) {
   let lastError;
@@ -178,19 +277,19 @@ async function getWeatherData(location, start, end, units = 'metric') {
   }));
   
   // Transform to expected format
-  const hourly = data.hourly.time.map((time, i) => ({
+  const hourly = measure('transform_hourly', () => data.hourly.time.map((time, i) => ({
     time: new Date(time).toISOString(),
     temp: data.hourly.temperature_2m[i],
     precip_mm: data.hourly.precipitation[i] || 0,
     wind_kph: (data.hourly.wind_speed_10m[i] || 0) * (units === 'imperial' ? 2.237 : 3.6),
-  }));
+  })));
   
-  const daily = data.daily.time.map((date, i) => ({
+  const daily = measure('transform_daily', () => data.daily.time.map((date, i) => ({
     date,
     tmin: data.daily.temperature_2m_min[i],
     tmax: data.daily.temperature_2m_max[i],
     precip_mm: data.daily.precipitation_sum[i] || 0,
-  }));
+  })));
   
   const result = {
     source: 'open-meteo',
@@ -443,7 +542,7 @@ function validateParameter(parameter) {
   return parameter ? parameter.toLowerCase() : 'pm25';
 }
 
-server.setRequestHandler(CallToolRequestSchema, async (request) => {
+async function handleToolCall(request) {
   const { name, arguments: args } = request.params;
   
   try {
@@ -454,9 +553,11 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
     
     // Validate and sanitize inputs
     if (name === 'get_weather') {
-      const location = validateLocation(args.location);
-      const start = validateDate(args.start);
-      const end = validateDate(args.end);
+      const { location, start, end } = measure('validate', () => ({
+        location: validateLocation(args.location),
+        start: validateDate(args.start),
+        end: validateDate(args.end),
+      }));
       const units = args.units === 'imperial' ? 'imperial' : 'metric';
       
       const result = await getWeatherData(
@@ -470,13 +571,15 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
         content: [
           {
             type: 'text',
-            text: JSON.stringify(result),
+            text: measure('stringify', () => JSON.stringify(result)),
           },
         ],
       };
     } else if (name === 'get_air_quality') {
-      const location = validateLocation(args.location);
-      const parameter = validateParameter(args.parameter);
+      const { location, parameter } = measure('validate', () => ({
+        location: validateLocation(args.location),
+        parameter: validateParameter(args.parameter),
+      }));
       
       const result = await getAirQualityData(
         location,
@@ -487,7 +590,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
         content: [
           {
             type: 'text',
-            text: JSON.stringify(result),
+            text: measure('stringify', () => JSON.stringify(result)),
           },
         ],
       };
@@ -514,7 +617,11 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
       `Tool execution failed: ${error.message}`
     );
   }
-});
+}
+
+server.setRequestHandler(CallToolRequestSchema, (request) => (
+  profiler ? profiler.run(request.params.name, () => handleToolCall(request)) : handleToolCall(request)
+));
 
 // Start server
 async function main() {
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Multi-worker server for Weather & Air Quality Planner
+
+`adk web` runs everything in one process. This script serves the same ADK
+FastAPI app with several uvicorn worker processes that share:
+- one SQLite session store, so any worker can continue any session
+  (no sticky routing needed in front of the workers)
+- one SQLite tool cache, so a forecast fetched by one worker is reused by
+  all of them instead of being cached once per worker
+- one SQLite alert store, so alert subscriptions work from any worker and
+  survive restarts; a lease row elects the single worker that evaluates them
+
+Each worker warms up in the background on startup (agent import, MCP session,
+prefetch for WEATHER_AGENT_WARM_CITIES) and /health returns 503 until done.
+An agent run whose client disconnects (e.g. the chat UI started a new
+session) is cancelled instead of running to completion.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from contextlib import asynccontextmanager, suppress
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("WEATHER_AGENT_DATA_DIR", os.path.join(ROOT, ".data"))
+RUN_PATHS = ("/run", "/run_sse")
+
+log = logging.getLogger("weather_agent")
+
+
+class CancelOnDisconnect:
+    """ASGI middleware that cancels an agent run when its client goes away.
+
+    Starlette only notices a disconnect when it next writes to the socket, so
+    an abandoned /run request would keep calling Gemini and the MCP tools
+    until the whole turn finished. This reads the request body up front, runs
+    the app in a task and cancels it as soon as the client disconnects, so
+    the runner makes no further model or tool calls. A tool call already
+    running in a worker thread (asyncio.to_thread) cannot be interrupted; it
+    finishes and its result is discarded.
+    """
+    def __init__(self, app, paths=RUN_PATHS):
+        self.app = app
+        self.paths = paths
+        self.cancelled = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        buffered = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            buffered.append(message)
+            if not message.get("more_body"):
+                break
+
+        disconnected = asyncio.Event()
+        response_sent = False
+
+        async def replay():
+            if buffered:
+                return buffered.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def tracked_send(message):
+            nonlocal response_sent
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                response_sent = True
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        app_task = asyncio.ensure_future(self.app(scope, replay, tracked_send))
+        watch_task = asyncio.ensure_future(watch())
+        await asyncio.wait({app_task, watch_task}, return_when=asyncio.FIRST_COMPLETED)
+        if app_task.done():
+            watch_task.cancel()
+            return app_task.result()
+
+        disconnected.set()
+        if response_sent:
+            # uvicorn reports a disconnect as soon as the response is complete;
+            # work after the last body (background tasks, teardown) must finish.
+            return await app_task
+        app_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await app_task
+        self.cancelled += 1
+        log.info("Cancelled %s after client disconnect (total cancelled: %d)", scope["path"], self.cancelled)
+
+
+def start_alert_evaluator():
+    """Join the alert evaluator election, so subscriptions stored before a restart keep firing."""
+    from google.adk.cli.utils.service_factory import create_session_service_from_options
+    from weather_agent.agent import get_mcp_server, root_agent
+    from weather_agent.alerts import SessionNotifier, ensure_evaluator
+
+    # Same factory get_fast_api_app uses, so alerts land in the store the app reads
+    sessions = create_session_service_from_options(
+        base_dir=ROOT, session_service_uri=os.environ["WEATHER_AGENT_SESSION_URI"]
+    )
+    ensure_evaluator(get_mcp_server(), SessionNotifier(sessions, root_agent.name))
+
+
+async def startup():
+    from weather_agent.warmup import warm_up
+
+    state = await warm_up()
+    if state.failed:
+        return
+    try:
+        start_alert_evaluator()
+    except Exception as e:
+        log.error("Could not start the alert evaluator: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background so the port opens immediately and load
+    # balancers can poll /health instead of timing out on connect.
+    task = asyncio.create_task(startup())
+    yield
+    task.cancel()
+
+
+def create_app():
+    """App factory called by uvicorn in every worker process."""
+    # Importing the package loads the agent and google.adk; time it here,
+    # since by the time warm_up() runs everything is already imported.
+    started = time.perf_counter()
+    from weather_agent.warmup import STATE, record_import
+    record_import(STATE, started)
+
+    from fastapi.responses import JSONResponse
+    from google.adk.cli.fast_api import get_fast_api_app
+    from weather_agent.alerts import alert_stats
+    from weather_agent.tool_memo import MEMO
+
+    app = get_fast_api_app(
+        agents_dir=ROOT,
+        session_service_uri=os.environ["WEATHER_AGENT_SESSION_URI"],
+        web=True,
+        lifespan=lifespan,
+    )
+    app.add_middleware(CancelOnDisconnect)
+
+    # ADK registers an always-OK /health; replace it with the readiness gate.
+    app.router.routes = [r for r in app.router.routes if getattr(r, "path", None) != "/health"]
+
+    @app.get("/health")
+    async def health():
+        return JSONResponse(
+            {**STATE.as_dict(), "tool_dedup": MEMO.stats(), "alerts": alert_stats()},
+            status_code=200 if STATE.ready else 503,
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the agent with multiple worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    # Set before uvicorn forks so every worker inherits the same stores.
+    os.environ.setdefault("WEATHER_AGENT_CACHE_PATH", os.path.join(DATA_DIR, "tool_cache.db"))
+    os.environ.setdefault("WEATHER_AGENT_ALERTS_PATH", os.path.join(DATA_DIR, "alerts.db"))
+    os.environ.setdefault(
+        "WEATHER_AGENT_SESSION_URI", f"sqlite:///{os.path.join(DATA_DIR, 'sessions.db')}"
+    )
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("ERROR: uvicorn not installed. Install it with: pip install uvicorn")
+        sys.exit(1)
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    uvicorn.run(
+        "serve:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
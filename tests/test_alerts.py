@@ -0,0 +1,176 @@
+"""
+Unit tests for alert subscriptions and the incremental evaluator.
+"""
+import asyncio
+import itertools
+import pytest
+
+from weather_agent.alerts import AlertEvaluator, AlertRegistry
+
+
+_fetches = itertools.count()
+
+
+def forecast(wind_by_day):
+    return {
+        "source": "open-meteo",
+        # Like the real server: a fresh timestamp on every fetch
+        "generated_at": f"2099-01-17T00:00:{next(_fetches) % 60:02d}.000Z",
+        "hourly": [
+            {"time": f"{day}T{h:02d}:00:00.000Z", "temp": 15, "precip_mm": 0, "wind_kph": wind}
+            for day, wind in wind_by_day.items() for h in range(0, 24, 6)
+        ],
+    }
+
+
+class FakeMCPServer:
+    def __init__(self, wind_by_day):
+        self.wind_by_day = wind_by_day
+        self.calls = []
+
+    async def get_weather(self, location, start, end):
+        self.calls.append(("get_weather", location))
+        return forecast(self.wind_by_day)
+
+    async def get_air_quality(self, location):
+        self.calls.append(("get_air_quality", location))
+        return {"aqi": 4, "measurements": [{"parameter": "pm2_5", "value": 80.0}], "timestamp": "2025-01-18T00:00:00.000Z"}
+
+
+def make_evaluator(registry, mcp):
+    sent = []
+
+    async def notify(sub, message):
+        sent.append((sub.session_id, message))
+
+    return AlertEvaluator(registry, mcp, notify), sent
+
+
+def test_one_fetch_per_location_for_many_subscribers():
+    """Thousands of subscriptions on one location cost one upstream fetch per tick."""
+    registry = AlertRegistry()
+    for i in range(2000):
+        registry.subscribe("weather_agent", f"u{i}", f"s{i}", "Kathmandu", "wind_kph", ">", 30 + i % 20,
+                           "2099-01-18", "2099-01-19")
+    assert registry.location_count() == 1
+    mcp = FakeMCPServer({"2099-01-17": 10, "2099-01-18": 42, "2099-01-19": 20})
+    evaluator, sent = make_evaluator(registry, mcp)
+
+    asyncio.run(evaluator.tick())
+
+    assert mcp.calls == [("get_weather", "Kathmandu")]
+    # Thresholds 30..41 are exceeded by 42 kph on the 18th; 42..49 are not
+    assert len(sent) == 2000 * 12 // 20
+    assert "2099-01-18" in sent[0][1]
+
+
+def test_unchanged_forecast_is_not_reevaluated_and_alerts_fire_once():
+    """Alerts fire once; an unchanged forecast skips evaluation; a change re-arms."""
+    registry = AlertRegistry()
+    registry.subscribe("weather_agent", "u1", "s1", "Pokhara", "wind_kph", ">", 40)
+    mcp = FakeMCPServer({"2099-01-18": 45})
+    evaluator, sent = make_evaluator(registry, mcp)
+
+    async def run():
+        await evaluator.tick()
+        await evaluator.tick()
+        mcp.wind_by_day = {"2099-01-18": 20}   # calms down: re-arms silently
+        await evaluator.tick()
+        mcp.wind_by_day = {"2099-01-18": 50}   # exceeds again: fires again
+        await evaluator.tick()
+
+    asyncio.run(run())
+    assert len(sent) == 2
+    assert evaluator.stats["skipped_unchanged"] == 1
+    assert evaluator.stats["evaluations"] == 3
+
+
+def test_new_subscription_on_unchanged_location_is_evaluated():
+    """A subscription added after the last change is still checked on the next tick."""
+    registry = AlertRegistry()
+    registry.subscribe("weather_agent", "u1", "s1", "Lalitpur", "wind_kph", ">", 100)
+    mcp = FakeMCPServer({"2099-01-18": 45})
+    evaluator, sent = make_evaluator(registry, mcp)
+
+    async def run():
+        await evaluator.tick()
+        registry.subscribe("weather_agent", "u2", "s2", "lalitpur ", "wind_kph", ">", 40)
+        await evaluator.tick()
+
+    asyncio.run(run())
+    assert [session for session, _ in sent] == ["s2"]
+
+
+def test_air_quality_metric_and_validation():
+    """Air-quality metrics use the latest measurement; bad input is rejected."""
+    registry = AlertRegistry()
+    registry.subscribe("weather_agent", "u1", "s1", "Delhi", "pm2_5", ">", 55)
+    mcp = FakeMCPServer({})
+    evaluator, sent = make_evaluator(registry, mcp)
+    asyncio.run(evaluator.tick())
+    assert mcp.calls == [("get_air_quality", "Delhi")]
+    assert len(sent) == 1
+
+    with pytest.raises(ValueError):
+        registry.subscribe("weather_agent", "u1", "s1", "Delhi", "gusts", ">", 40)
+    with pytest.raises(ValueError):
+        registry.subscribe("weather_agent", "u1", "s1", "Delhi", "wind_kph", ">=", 40)
+
+
+def test_expired_subscriptions_are_removed():
+    """Subscriptions whose window has passed are dropped."""
+    registry = AlertRegistry()
+    sub = registry.subscribe("weather_agent", "u1", "s1", "Paris", "temp", "<", 0, "2020-01-01", "2020-01-02")
+    assert registry.expire("2025-01-01") == 1
+    assert not registry.unsubscribe(sub.id)
+    assert len(registry) == 0
+
+
+def test_fresh_generated_at_alone_is_not_a_change():
+    """Only the series the metrics read count as a change, not per-fetch metadata."""
+    registry = AlertRegistry()
+    registry.subscribe("weather_agent", "u1", "s1", "Pokhara", "wind_kph", ">", 40)
+    mcp = FakeMCPServer({"2099-01-18": 20})
+    evaluator, _ = make_evaluator(registry, mcp)
+
+    async def run():
+        for _ in range(3):
+            await evaluator.tick()
+
+    asyncio.run(run())
+    assert evaluator.stats["evaluations"] == 1
+    assert evaluator.stats["skipped_unchanged"] == 2
+
+
+def test_subscriptions_are_shared_through_the_store(tmp_path):
+    """Workers opening the same file see each other's subscriptions and alert state."""
+    path = str(tmp_path / "alerts.db")
+    worker_a, worker_b = AlertRegistry(path), AlertRegistry(path)
+    sub = worker_a.subscribe("weather_agent", "u1", "s1", "Kathmandu", "wind_kph", ">", 40)
+
+    assert [s.id for s in worker_b.for_session("s1")] == [sub.id]
+    evaluator, sent = make_evaluator(worker_b, FakeMCPServer({"2099-01-18": 45}))
+    asyncio.run(evaluator.tick())
+    assert len(sent) == 1
+    assert worker_a.for_session("s1")[0].triggered
+
+    assert worker_b.unsubscribe(sub.id)
+    assert worker_a.for_session("s1") == []
+    # A restarted worker sees what is left
+    assert len(AlertRegistry(path)) == 0
+
+
+def test_only_one_worker_holds_the_evaluator_lease(tmp_path):
+    """The lease elects one evaluator; another worker takes over once it expires."""
+    path = str(tmp_path / "alerts.db")
+    worker_a, worker_b = AlertRegistry(path), AlertRegistry(path)
+    assert worker_a.acquire_lease("a", ttl=60)
+    assert not worker_b.acquire_lease("b", ttl=60)
+    assert worker_a.acquire_lease("a", ttl=-1)   # renewal, then let it lapse
+    assert worker_b.acquire_lease("b", ttl=60)
+    worker_b.release_lease("b")
+    assert worker_a.acquire_lease("a", ttl=60)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,96 @@
+"""
+Unit tests for the bulk export pipeline (CSV output, resume, failures).
+"""
+import csv
+import asyncio
+import pytest
+
+from weather_agent.bulk_export import export, load_completed
+
+
+class FakeMCPServer:
+    def __init__(self, fail_city=None, bad_envelope_city=None):
+        self.fail_city = fail_city
+        self.bad_envelope_city = bad_envelope_city
+        self.calls = []
+
+    async def get_weather(self, location, start, end):
+        self.calls.append(location)
+        if location == self.fail_city:
+            raise RuntimeError("LOCATION_NOT_FOUND")
+        if location == self.bad_envelope_city:
+            return {"content": [{"type": "text", "text": "Tool execution failed: upstream timeout"}]}
+        return {
+            "source": "open-meteo",
+            "generated_at": "2025-01-15T00:00:00.000Z",
+            "hourly": [{"time": f"2025-01-15T{h:02d}:00:00.000Z", "temp": 10 + h, "precip_mm": 0, "wind_kph": 5.4}
+                       for h in range(24)],
+            "daily": [{"date": "2025-01-15", "tmin": 8.1, "tmax": 19.4, "precip_mm": 0.2}],
+        }
+
+    async def get_air_quality(self, location):
+        return {
+            "source": "openweathermap", "aqi": 3, "aqi_meaning": "Moderate",
+            "measurements": [{"parameter": "pm2_5", "value": 35.2}, {"parameter": "pm10", "value": 51.0}],
+            "timestamp": "2025-01-15T00:00:00.000Z",
+        }
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def read_dataset(directory):
+    """All rows of a dataset directory (every part file)."""
+    return [row for part in sorted(directory.glob("part-*.csv")) for row in read_csv(part)]
+
+
+def test_export_writes_typed_csv_parts(tmp_path):
+    """Each dataset gets one part file per batch with the schema's columns."""
+    counts = asyncio.run(export(FakeMCPServer(), ["Kathmandu", "New York"], str(tmp_path), "csv", 2))
+    assert counts == {"exported": 2, "skipped": 0, "failed": 0}
+    assert len(list((tmp_path / "weather_hourly").iterdir())) == 1
+
+    hourly = [row for row in read_dataset(tmp_path / "weather_hourly") if row["city"] == "New York"]
+    assert len(hourly) == 24
+    assert hourly[0]["time"] == "2025-01-15T00:00:00+00:00"
+    assert float(hourly[3]["temp"]) == 13.0
+
+    aq = [row for row in read_dataset(tmp_path / "air_quality") if row["city"] == "Kathmandu"]
+    assert aq == [{"city": "Kathmandu", "timestamp": "2025-01-15T00:00:00+00:00", "aqi": "3",
+                   "aqi_meaning": "Moderate", "pm2_5": "35.2", "pm10": "51.0"}]
+
+
+def test_export_resumes_and_retries_failures(tmp_path):
+    """Completed cities are skipped on re-run; failed cities are retried."""
+    first = asyncio.run(export(FakeMCPServer(fail_city="Atlantis"), ["Kathmandu", "Atlantis"], str(tmp_path)))
+    assert first == {"exported": 1, "skipped": 0, "failed": 1}
+    assert load_completed(str(tmp_path)) == {"Kathmandu"}
+    assert {row["city"] for row in read_dataset(tmp_path / "weather_daily")} == {"Kathmandu"}
+
+    mcp = FakeMCPServer()
+    second = asyncio.run(export(mcp, ["Kathmandu", "Atlantis"], str(tmp_path)))
+    assert second == {"exported": 1, "skipped": 1, "failed": 0}
+    assert mcp.calls == ["Atlantis"]
+    assert sorted(row["city"] for row in read_dataset(tmp_path / "weather_daily")) == ["Atlantis", "Kathmandu"]
+
+
+def test_unparseable_error_envelope_fails_only_that_city(tmp_path):
+    """A non-JSON error envelope counts as a failed city instead of aborting the run."""
+    counts = asyncio.run(export(FakeMCPServer(bad_envelope_city="Atlantis"),
+                                ["Atlantis", "Kathmandu"], str(tmp_path)))
+    assert counts == {"exported": 1, "skipped": 0, "failed": 1}
+
+
+def test_cities_are_batched_into_parts(tmp_path):
+    """Each full batch becomes one part file per dataset and is recorded in the manifest."""
+    cities = [f"City{i}" for i in range(5)]
+    counts = asyncio.run(export(FakeMCPServer(), cities, str(tmp_path), batch_size=2))
+    assert counts["exported"] == 5
+    assert len(list((tmp_path / "weather_daily").iterdir())) == 3
+    assert load_completed(str(tmp_path)) == set(cities)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
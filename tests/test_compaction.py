@@ -0,0 +1,97 @@
+"""
+Unit tests for conversation history compaction.
+Contents are built with SimpleNamespace stand-ins for google.genai types.
+"""
+from types import SimpleNamespace
+import pytest
+
+from weather_agent.compaction import compact_history, estimate_tokens, resolve_context, split_turns
+
+
+def text(role, value):
+    return SimpleNamespace(role=role, parts=[SimpleNamespace(text=value, function_call=None, function_response=None)])
+
+
+def call(name, args):
+    fc = SimpleNamespace(name=name, args=args)
+    return SimpleNamespace(role="model", parts=[SimpleNamespace(text=None, function_call=fc, function_response=None)])
+
+
+def response(name, result):
+    fr = SimpleNamespace(name=name, response=result)
+    return SimpleNamespace(role="user", parts=[SimpleNamespace(text=None, function_call=None, function_response=fr)])
+
+
+def weather_turn(city, day):
+    hourly = [{"time": f"{day}T{h:02d}:00:00Z", "temp": 15, "precip_mm": 0, "wind_kph": 7} for h in range(24)]
+    return [
+        text("user", f"Weather in {city} on {day}?"),
+        call("get_weather", {"location": city, "start": day, "end": day}),
+        response("get_weather", {"hourly": hourly, "daily": [{"date": day, "tmin": 10, "tmax": 20}]}),
+        text("model", f"{day} in {city}: Temperatures will range from 10–20 °C."),
+    ]
+
+
+def test_split_turns_keeps_tool_responses_in_turn():
+    """Function responses (role=user) do not start a new turn."""
+    contents = weather_turn("Kathmandu", "2025-01-15") + weather_turn("London", "2025-01-16")
+    turns = split_turns(contents)
+    assert len(turns) == 2
+    assert all(len(t) == 4 for t in turns)
+
+
+def test_short_history_is_untouched():
+    """Nothing is folded while the history fits the budget."""
+    contents = weather_turn("Kathmandu", "2025-01-15") + [text("user", "What about tomorrow?")]
+    kept, context = compact_history(contents, max_tokens=10_000, keep_turns=3)
+    assert kept == contents
+    assert context["folded_turns"] == 0
+
+
+def test_long_history_is_capped_and_context_resolved():
+    """Older turns are folded into resolved context and the sent history stays bounded."""
+    contents = []
+    for day in range(1, 21):
+        contents += weather_turn("Kathmandu" if day < 20 else "Pokhara", f"2025-01-{day:02d}")
+    contents.append(text("user", "What about tomorrow?"))
+
+    kept, context = compact_history(contents, max_tokens=2000, keep_turns=3)
+
+    assert len(split_turns(kept)) <= 3
+    assert estimate_tokens(kept) <= 2000
+    assert context["location"] == "Kathmandu"
+    assert context["end"] == "2025-01-18"
+    # Hourly series are dropped from the summarized tool results
+    assert "hourly" not in context["last_results"]["get_weather"]
+
+
+def test_latest_forecast_dates_replace_older_ones():
+    """Dates come from the latest forecast call as a unit, never mixed across calls."""
+    contents = [
+        call("get_weather", {"location": "Kathmandu", "start": "2025-01-01", "end": "2025-01-03"}),
+        call("get_weather", {"location": "Pokhara", "start": "2025-01-05"}),
+        call("get_air_quality", {"location": "Lalitpur"}),
+    ]
+    context = resolve_context(contents)
+    assert context["location"] == "Lalitpur"
+    assert context["start"] == "2025-01-05"
+    assert "end" not in context
+
+
+def test_folded_turns_are_not_rescanned():
+    """A second pass only folds newly dropped turns on top of the previous context."""
+    contents = []
+    for day in range(1, 6):
+        contents += weather_turn("Kathmandu", f"2025-01-{day:02d}")
+    _, first = compact_history(contents, max_tokens=10_000, keep_turns=2)
+    assert first["folded_turns"] == 3
+
+    contents += weather_turn("Lalitpur", "2025-01-06")
+    kept, second = compact_history(contents, previous=first, max_tokens=10_000, keep_turns=2)
+    assert second["folded_turns"] == 4
+    assert second["end"] == "2025-01-04"
+    assert len(split_turns(kept)) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,71 @@
+"""
+Unit tests for the stdio MCP client, run against a small fake MCP server.
+"""
+import sys
+import json
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+from weather_agent.mcp_client import MCPClient, MCPError
+
+FAKE_SERVER = textwrap.dedent("""
+    import sys, json
+    print("log line on stdout is ignored", flush=True)
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if "id" not in msg:
+            continue
+        if msg["method"] == "initialize":
+            result = {"protocolVersion": msg["params"]["protocolVersion"], "capabilities": {}}
+        elif msg["params"]["arguments"].get("location") == "Atlantis":
+            print(json.dumps({"jsonrpc": "2.0", "id": msg["id"],
+                              "error": {"code": -32602, "message": "LOCATION_NOT_FOUND"}}), flush=True)
+            continue
+        else:
+            payload = {"tool": msg["params"]["name"], "args": msg["params"]["arguments"]}
+            result = {"content": [{"type": "text", "text": json.dumps(payload)}]}
+        print(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": result}), flush=True)
+""")
+
+
+@pytest.fixture
+def client(tmp_path):
+    script = tmp_path / "fake_server.py"
+    script.write_text(FAKE_SERVER)
+    client = MCPClient(command=[sys.executable, str(script)], cwd=str(tmp_path), timeout=10)
+    yield client
+    client.close()
+
+
+def test_call_tool_returns_content_and_drops_empty_args(client):
+    """Tool results come back as the MCP content envelope; None arguments are omitted."""
+    result = client.call_tool("get_weather", {"location": "Kathmandu", "start": None, "units": "metric"})
+    payload = json.loads(result["content"][0]["text"])
+    assert payload == {"tool": "get_weather", "args": {"location": "Kathmandu", "units": "metric"}}
+
+
+def test_concurrent_calls_get_their_own_responses(client):
+    """Calls from several threads are matched to their responses by id."""
+    cities = [f"City{i}" for i in range(20)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda c: client.call_tool("get_air_quality", {"location": c}), cities))
+    assert [json.loads(r["content"][0]["text"])["args"]["location"] for r in results] == cities
+
+
+def test_server_errors_raise(client):
+    """JSON-RPC errors from the server surface as MCPError."""
+    with pytest.raises(MCPError, match="LOCATION_NOT_FOUND"):
+        client.call_tool("get_weather", {"location": "Atlantis"})
+
+
+def test_server_exit_fails_waiting_calls(tmp_path):
+    """A server that dies fails the call instead of hanging until the timeout."""
+    client = MCPClient(command=[sys.executable, "-c", "import sys; sys.stdin.readline()"],
+                       cwd=str(tmp_path), timeout=10)
+    with pytest.raises(MCPError, match="exited"):
+        client.start()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
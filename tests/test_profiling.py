@@ -0,0 +1,56 @@
+"""
+Unit tests for profiling mode and the flamegraph converter.
+"""
+import json
+import pytest
+
+from weather_agent.profiling import ToolProfiler
+import flamegraph
+
+
+def test_tool_profiler_writes_pstats(tmp_path, capsys):
+    """A profiled call returns its result, dumps a .pstats file and logs stats."""
+    profiler = ToolProfiler(str(tmp_path))
+    result = profiler.run("get_weather", lambda n: [{"hour": i} for i in range(n)], 1000)
+    assert len(result) == 1000
+
+    log = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    assert log["tool"] == "get_weather"
+    assert log["profile"]["pstats"].endswith(".pstats")
+    assert log["profile"]["alloc_peak_bytes"] > 0
+
+    folded = flamegraph.fold_pstats(log["profile"]["pstats"])
+    assert any("<lambda>" in stack for stack in folded)
+
+
+def test_fold_cpuprofile_weights_by_time():
+    """Samples are folded root-to-leaf and weighted by their time deltas."""
+    frame = lambda name, line=0: {"functionName": name, "url": "file:///srv/mcp-server/index.js", "lineNumber": line}
+    profile = {
+        "nodes": [
+            {"id": 1, "callFrame": {"functionName": "(root)"}, "children": [2]},
+            {"id": 2, "callFrame": frame("handleToolCall", 500), "children": [3, 4]},
+            {"id": 3, "callFrame": frame("validateDate", 430), "children": []},
+            {"id": 4, "callFrame": frame("getWeatherData", 150), "children": []},
+        ],
+        "samples": [3, 4, 4, 2],
+        "timeDeltas": [100, 250, 250, 50],
+    }
+    folded = flamegraph.fold_cpuprofile(profile)
+    assert folded == {
+        "handleToolCall (index.js:501);validateDate (index.js:431)": 100,
+        "handleToolCall (index.js:501);getWeatherData (index.js:151)": 500,
+        "handleToolCall (index.js:501)": 50,
+    }
+
+
+def test_fold_heapprofile_weights_by_bytes():
+    """Allocation samples are folded with their self size in bytes."""
+    profile = {"head": {"callFrame": {"functionName": "(root)"}, "selfSize": 0, "children": [
+        {"callFrame": {"functionName": "stringify", "url": ""}, "selfSize": 4096, "children": []},
+    ]}}
+    assert flamegraph.fold_heapprofile(profile) == {"stringify": 4096}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Unit tests for serve.py: the readiness endpoint and cancelling agent runs
+when the client disconnects.
+"""
+import asyncio
+import pytest
+
+from serve import CancelOnDisconnect, create_app
+
+
+def _client(messages, disconnect_after=None):
+    """ASGI receive() that yields `messages`, then disconnects after a delay (or never)."""
+    queue = list(messages)
+
+    async def receive():
+        if queue:
+            return queue.pop(0)
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+    return receive
+
+
+def _scope(path="/run"):
+    return {"type": "http", "path": path}
+
+
+def test_completed_run_is_passed_through():
+    """A run that finishes normally sees the full body and sends its response."""
+    sent, bodies = [], []
+
+    async def app(scope, receive, send):
+        bodies.append((await receive())["body"] + (await receive())["body"])
+        await send({"type": "http.response.start", "status": 200})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = CancelOnDisconnect(app)
+    body = [{"type": "http.request", "body": b"a", "more_body": True},
+            {"type": "http.request", "body": b"b"}]
+    asyncio.run(middleware(_scope(), _client(body), send))
+
+    assert bodies == [b"ab"]
+    assert sent == [{"type": "http.response.start", "status": 200}]
+    assert middleware.cancelled == 0
+
+
+def test_disconnect_cancels_run():
+    """A client disconnect cancels the in-flight agent run."""
+    state = {}
+
+    async def app(scope, receive, send):
+        await receive()
+        try:
+            await asyncio.sleep(10)
+            state["finished"] = True
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def send(message):
+        pass
+
+    middleware = CancelOnDisconnect(app)
+    body = [{"type": "http.request", "body": b"{}"}]
+    asyncio.run(asyncio.wait_for(middleware(_scope(), _client(body, disconnect_after=0.01), send), 1))
+
+    assert state == {"cancelled": True}
+    assert middleware.cancelled == 1
+
+
+def test_work_after_response_is_not_cancelled():
+    """The disconnect uvicorn reports after a complete response does not cancel post-response work."""
+    state = {}
+
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": b"{}"})
+        await asyncio.sleep(0.05)  # e.g. BackgroundTasks, session writes
+        state["finished"] = True
+
+    async def send(message):
+        pass
+
+    middleware = CancelOnDisconnect(app)
+    body = [{"type": "http.request", "body": b"{}"}]
+    asyncio.run(asyncio.wait_for(middleware(_scope(), _client(body, disconnect_after=0), send), 1))
+
+    assert state == {"finished": True}
+    assert middleware.cancelled == 0
+
+
+def test_other_paths_are_untouched():
+    """Requests outside the run endpoints get the original receive()."""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(receive)
+
+    receive = _client([])
+    asyncio.run(CancelOnDisconnect(app)(_scope("/health"), receive, None))
+    assert seen == [receive]
+
+
+def test_health_is_the_readiness_gate(tmp_path, monkeypatch):
+    """/health is ours, not ADK's always-OK route: 503 while warming, 200 once ready."""
+    from fastapi.testclient import TestClient
+    from weather_agent.warmup import STATE
+
+    monkeypatch.setenv("WEATHER_AGENT_SESSION_URI", f"sqlite:///{tmp_path / 'sessions.db'}")
+    client = TestClient(create_app())  # no `with`: the warm-up lifespan does not run
+
+    monkeypatch.setattr(STATE, "ready", False)
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming"
+    assert {"phases_ms", "tool_dedup", "alerts"} <= set(response.json())
+
+    monkeypatch.setattr(STATE, "ready", True)
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
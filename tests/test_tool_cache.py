@@ -0,0 +1,74 @@
+"""
+Unit tests for the shared SQLite tool cache used by multi-worker deployments.
+"""
+import asyncio
+import pytest
+
+from weather_agent.agent import MCPServer
+from weather_agent.tool_cache import SharedToolCache
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def call_tool(self, name, args):
+        self.calls += 1
+        return {"source": "open-meteo", "tool": name, "location": args["location"]}
+
+
+def test_cache_roundtrip(tmp_path):
+    """Values written by one cache instance are visible to another on the same file."""
+    path = str(tmp_path / "cache.db")
+    writer = SharedToolCache(path)
+    reader = SharedToolCache(path)
+
+    args = {"location": "Kathmandu", "parameter": "pm25"}
+    assert reader.get("get_air_quality", args) is None
+    writer.set("get_air_quality", args, {"aqi": 3})
+    assert reader.get("get_air_quality", args) == {"aqi": 3}
+    assert len(reader) == 1
+
+
+def test_cache_key_ignores_arg_order():
+    """Argument order must not produce distinct cache entries."""
+    a = SharedToolCache.make_key("get_weather", {"location": "Paris", "units": "metric"})
+    b = SharedToolCache.make_key("get_weather", {"units": "metric", "location": "Paris"})
+    assert a == b
+
+
+def test_cache_ttl_expiry(tmp_path):
+    """Expired entries are treated as misses and purged."""
+    cache = SharedToolCache(str(tmp_path / "cache.db"), ttl=-1)
+    cache.set("get_weather", {"location": "Paris"}, {"daily": []})
+    assert cache.get("get_weather", {"location": "Paris"}) is None
+    assert cache.purge_expired() == 1
+
+
+def test_expired_entries_purged_on_write(tmp_path):
+    """Writes periodically sweep expired rows so the file does not grow forever."""
+    cache = SharedToolCache(str(tmp_path / "cache.db"), ttl=-1, purge_every=3)
+    for day in range(1, 4):
+        cache.set("get_weather", {"location": "Paris", "start": f"2025-01-0{day}"}, {"daily": []})
+    assert len(cache) == 0
+
+
+def test_mcp_server_shares_cache_between_instances(tmp_path):
+    """Two MCPServer instances (two workers) fetch each location only once."""
+    path = str(tmp_path / "cache.db")
+    first, second = CountingClient(), CountingClient()
+    worker_a = MCPServer(client=first, cache=SharedToolCache(path))
+    worker_b = MCPServer(client=second, cache=SharedToolCache(path))
+
+    async def run():
+        a = await worker_a.get_weather("Kathmandu", "2025-01-15", "2025-01-15")
+        b = await worker_b.get_weather("Kathmandu", "2025-01-15", "2025-01-15")
+        return a, b
+
+    a, b = asyncio.run(run())
+    assert a == b
+    assert first.calls + second.calls == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,68 @@
+"""
+Unit tests for per-session tool-call dedup (60s identical-call policy).
+"""
+import json
+import pytest
+
+from weather_agent.tool_memo import ToolCallMemo
+
+
+def test_repeat_within_window_is_suppressed():
+    """An identical call in the same session is answered from the memo."""
+    memo = ToolCallMemo(window=60)
+    args = {"location": "Kathmandu", "start": "2025-01-15", "end": "2025-01-15"}
+    assert memo.lookup("s1", "get_weather", args) is None
+    memo.record("s1", "get_weather", args, {"daily": [1]})
+
+    assert memo.lookup("s1", "get_weather", dict(args)) == {"daily": [1]}
+    assert memo.suppressed == 1
+    assert memo.suppressed_by_session == {"s1": 1}
+    stats = memo.stats()
+    assert stats["sessions_with_suppressed_calls"] == 1
+    assert list(stats["top_sessions"].values()) == [1]
+    assert "s1" not in json.dumps(stats)
+
+
+def test_memo_is_per_session_and_per_args():
+    """Other sessions and different arguments still reach the tool."""
+    memo = ToolCallMemo(window=60)
+    memo.record("s1", "get_air_quality", {"location": "Kathmandu"}, {"aqi": 3})
+    assert memo.lookup("s2", "get_air_quality", {"location": "Kathmandu"}) is None
+    assert memo.lookup("s1", "get_air_quality", {"location": "London"}) is None
+    assert memo.suppressed == 0
+
+
+def test_empty_arguments_are_normalized():
+    """Omitted optional arguments and empty strings are the same call."""
+    a = ToolCallMemo.make_key("get_weather", {"location": "Paris", "start": "", "end": None})
+    b = ToolCallMemo.make_key("get_weather", {"location": " Paris "})
+    assert a == b
+
+
+def test_expired_entries_are_refetched():
+    """Entries older than the window are not reused."""
+    memo = ToolCallMemo(window=-1)
+    memo.record("s1", "get_weather", {"location": "Paris"}, {"daily": []})
+    assert memo.lookup("s1", "get_weather", {"location": "Paris"}) is None
+
+
+def test_served_result_does_not_extend_window():
+    """Recording a memo-served result keeps the original timestamp."""
+    memo = ToolCallMemo(window=60)
+    result = {"daily": []}
+    memo.record("s1", "get_weather", {"location": "Paris"}, result)
+    stored_at = memo._sessions["s1"][ToolCallMemo.make_key("get_weather", {"location": "Paris"})][0]
+    memo.record("s1", "get_weather", {"location": "Paris"}, memo.lookup("s1", "get_weather", {"location": "Paris"}))
+    assert memo._sessions["s1"][ToolCallMemo.make_key("get_weather", {"location": "Paris"})][0] == stored_at
+
+
+def test_session_count_is_bounded():
+    """Least recently used sessions are evicted past max_sessions."""
+    memo = ToolCallMemo(window=60, max_sessions=2)
+    for sid in ("s1", "s2", "s3"):
+        memo.record(sid, "get_weather", {"location": "Paris"}, {"daily": []})
+    assert list(memo._sessions) == ["s2", "s3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""
+Unit tests for the warm startup phase.
+"""
+import asyncio
+import pytest
+
+from weather_agent.warmup import StartupState, warm_up
+
+
+class FakeMCPServer:
+    def __init__(self, fail_city=None):
+        self.started = False
+        self.calls = []
+        self.fail_city = fail_city
+
+    async def start(self):
+        self.started = True
+
+    async def get_air_quality(self, location):
+        self.calls.append(("get_air_quality", location))
+        if location == self.fail_city:
+            raise RuntimeError("LOCATION_NOT_FOUND")
+        return {"aqi": 2}
+
+    async def get_weather(self, location, start, end):
+        self.calls.append(("get_weather", location, start, end))
+        return {"daily": []}
+
+
+def test_warm_up_records_phases_and_becomes_ready():
+    """All phases are timed and readiness flips only after prefetching."""
+    mcp = FakeMCPServer()
+    state = StartupState()
+    assert state.as_dict()["status"] == "warming"
+
+    asyncio.run(warm_up(mcp=mcp, cities=["Kathmandu", "London"], state=state))
+
+    assert mcp.started
+    assert state.ready
+    assert set(state.phases) == {"import", "mcp_session", "air_quality", "forecast"}
+    # One air-quality call per city, today + tomorrow forecasts per city
+    assert sum(1 for c in mcp.calls if c[0] == "get_air_quality") == 2
+    assert sum(1 for c in mcp.calls if c[0] == "get_weather") == 4
+
+
+def test_warm_up_tolerates_failed_city():
+    """A city that fails to prefetch is reported but does not block readiness."""
+    state = StartupState()
+    asyncio.run(warm_up(mcp=FakeMCPServer(fail_city="Atlantis"), cities=["Atlantis"], state=state))
+
+    assert state.ready
+    assert "air_quality:Atlantis" in state.errors
+
+
+class FailingMCPServer(FakeMCPServer):
+    async def start(self):
+        raise RuntimeError("node not found")
+
+
+def test_warm_up_reports_failed_mcp_session():
+    """A failure to start the MCP session is reported instead of warming forever."""
+    state = StartupState()
+    asyncio.run(warm_up(mcp=FailingMCPServer(), cities=["Kathmandu"], state=state))
+
+    assert not state.ready
+    assert state.as_dict()["status"] == "failed"
+    assert state.errors == {"mcp_session": "node not found"}
+
+
+def test_import_phase_measured_by_caller_is_kept():
+    """serve.py times the import itself; warm_up() must not overwrite it with ~0."""
+    state = StartupState()
+    state.phases["import"] = 1830.2
+    asyncio.run(warm_up(mcp=FakeMCPServer(), cities=[], state=state))
+    assert state.phases["import"] == 1830.2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,10 +1,15 @@
-import os
-import sys
+import json
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from google.adk.agents.llm_agent import Agent
+from google.adk.tools.tool_context import ToolContext
+
+# Optional features (shared cache, profiling, alerts, compaction, dedup) are
+# imported on first use to keep import-time work minimal.
+if TYPE_CHECKING:
+    from .tool_cache import SharedToolCache
 
 # ──────────────────────────────────────────────────────────────
 # Minimal logging
@@ -17,27 +22,141 @@ log = logging.getLogger("weather_agent")
 # ──────────────────────────────────────────────────────────────
 class MCPServer:
     """Async wrapper around MCP client tools (get_weather / get_air_quality)."""
-    def __init__(self):
-        # Import from parent agent directory
-        agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agent"))
-        if agent_dir not in sys.path:
-            sys.path.insert(0, agent_dir)
-        from mcp_client import MCPClient  # type: ignore
-        self.client = MCPClient()
+    def __init__(self, client=None, cache: Optional["SharedToolCache"] = None):
+        if client is None:
+            from .mcp_client import MCPClient
+            client = MCPClient()
+        from .profiling import ToolProfiler
+        from .tool_cache import SharedToolCache
+
+        self.client = client
+        self.cache = cache if cache is not None else SharedToolCache.from_env()
+        self.profiler = ToolProfiler.from_env()
+
+    async def start(self) -> None:
+        """Eagerly start the MCP session instead of on the first tool call."""
+        start = getattr(self.client, "start", None)
+        if callable(start):
+            await asyncio.to_thread(start)
+
+    def _call_tool(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        if self.profiler is not None:
+            return self.profiler.run(name, self._call_tool_cached, name, args)
+        return self._call_tool_cached(name, args)
+
+    def _call_tool_cached(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        # Runs in a worker thread; the shared cache lets every worker process
+        # on this box reuse one fetch instead of going through its own MCP server.
+        if self.cache is not None:
+            cached = self.cache.get(name, args)
+            if cached is not None:
+                return cached
+        result = self.client.call_tool(name, args)
+        if self.cache is not None:
+            self.cache.set(name, args, result)
+        return result
 
     async def get_weather(self, location: str, start: str, end: str) -> Dict[str, Any]:
         return await asyncio.to_thread(
-            self.client.call_tool,
+            self._call_tool,
             "get_weather",
             {"location": location, "start": start, "end": end, "units": "metric"},
         )
 
     async def get_air_quality(self, location: str) -> Dict[str, Any]:
         return await asyncio.to_thread(
-            self.client.call_tool,
+            self._call_tool,
             "get_air_quality",
             {"location": location, "parameter": "pm25"},
         )
+
+
+def unwrap_result(result: Any) -> Dict[str, Any]:
+    """Unwrap a tool result that may still be an MCP text content envelope."""
+    if isinstance(result, str):
+        return json.loads(result)
+    if isinstance(result, dict) and isinstance(result.get("content"), list):
+        return json.loads(result["content"][0]["text"])
+    return result
+
+
+_mcp_server: Optional[MCPServer] = None
+
+def get_mcp_server() -> MCPServer:
+    """Return the process-wide MCPServer, creating it on first use."""
+    global _mcp_server
+    if _mcp_server is None:
+        _mcp_server = MCPServer()
+    return _mcp_server
+
+# ──────────────────────────────────────────────────────────────
+# Agent Tools
+# ──────────────────────────────────────────────────────────────
+async def get_weather(location: str, start: str = "", end: str = "") -> Dict[str, Any]:
+    """Get the hourly and daily weather forecast for a location.
+
+    Args:
+        location: City name (e.g. "Kathmandu") or "lat,lon" string.
+        start: Optional start date in ISO 8601 format (YYYY-MM-DD).
+        end: Optional end date in ISO 8601 format (YYYY-MM-DD).
+    """
+    return await get_mcp_server().get_weather(location, start or None, end or None)
+
+async def get_air_quality(location: str) -> Dict[str, Any]:
+    """Get the latest air-quality measurements (PM2.5, PM10, AQI) for a location.
+
+    Args:
+        location: City name (e.g. "Kathmandu") or "lat,lon" string.
+    """
+    return await get_mcp_server().get_air_quality(location)
+
+async def subscribe_alert(location: str, metric: str, operator: str, threshold: float,
+                          start: str = "", end: str = "",
+                          tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Register an alert that notifies this conversation when a forecast condition is met.
+
+    Args:
+        location: City name (e.g. "Kathmandu") or "lat,lon" string.
+        metric: One of "wind_kph", "temp", "precip_mm", "pm2_5", "pm10", "aqi".
+        operator: ">" to alert when the value rises above threshold, "<" when it falls below.
+        threshold: Threshold in the metric's unit (kph, °C, mm, µg/m³, or AQI 1-5).
+        start: Optional first day to watch (YYYY-MM-DD).
+        end: Optional last day to watch (YYYY-MM-DD).
+    """
+    from .alerts import REGISTRY, SessionNotifier, ensure_evaluator
+
+    session = tool_context.session
+    try:
+        sub = REGISTRY.subscribe(session.app_name, session.user_id, session.id, location,
+                                 metric, operator, threshold, start, end)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    # ToolContext has no public accessor for the session service
+    session_service = tool_context._invocation_context.session_service
+    ensure_evaluator(get_mcp_server(), SessionNotifier(session_service, tool_context.agent_name))
+    return {"status": "subscribed", "subscription_id": sub.id, "condition": sub.describe()}
+
+async def list_alerts(tool_context: ToolContext = None) -> Dict[str, Any]:
+    """List the alerts registered in this conversation."""
+    from .alerts import REGISTRY
+
+    subs = REGISTRY.for_session(tool_context.session.id)
+    return {"alerts": [{"subscription_id": s.id, "condition": s.describe()} for s in subs]}
+
+async def cancel_alert(subscription_id: str, tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Cancel an alert registered in this conversation.
+
+    Args:
+        subscription_id: The id returned by subscribe_alert or list_alerts.
+    """
+    from .alerts import REGISTRY
+
+    session_id = tool_context.session.id
+    if not any(s.id == subscription_id for s in REGISTRY.for_session(session_id)):
+        return {"status": "error", "error": "Alert not found"}
+    REGISTRY.unsubscribe(subscription_id)
+    return {"status": "cancelled", "subscription_id": subscription_id}
+
 # ──────────────────────────────────────────────────────────────
 # Current Datetime Function
 # ──────────────────────────────────────────────────────────────
@@ -47,7 +166,7 @@ def get_current_datetime():
 # ──────────────────────────────────────────────────────────────
 # System Prompt (Weather & Air Quality)
 # ──────────────────────────────────────────────────────────────
-SYSTEM_PROMPT = f"""
+SYSTEM_PROMPT = """
 # System Role: Weather & Air Quality Assistant
 
 You are a specialized assistant that provides clear, accurate, and data-based weather and air-quality updates.
@@ -56,6 +175,9 @@ You are a specialized assistant that provides clear, accurate, and data-based we
 You must use only the following MCP tools:
 - get_weather(location, start?, end?, units?)
 - get_air_quality(location, parameter?)
+- subscribe_alert(location, metric, operator, threshold, start?, end?), list_alerts(), cancel_alert(subscription_id)
+
+When the user asks to be warned about a condition (e.g. "warn me if wind exceeds 40 kph this weekend"), register it with subscribe_alert using resolved dates instead of answering with a forecast; the user will be notified in this conversation when it happens.
 
 Never fabricate or assume information.  
 If data is missing or unavailable, respond clearly with:
@@ -73,7 +195,7 @@ Always interpret relative time expressions automatically using the Asia/Kathmand
 - "next week" → +7 days
 - "yesterday" → -1 day
 
-The current system time (ISO format) is: **{get_current_datetime()}**
+The current system time (ISO format) is: **{current_datetime}**
 
 When resolving relative dates, use this reference timestamp and compute the correct target date automatically.  
 The resolved date must appear explicitly in the response (e.g., "Monday, November 10, 2025"), never use “today”, “tomorrow”, etc.
@@ -119,6 +241,27 @@ Air quality: Moderate (PM2.5 ≈ 35 µg/m³).
 🌤️ A great day for outdoor plans — light layers recommended."
 """
 
+def build_instruction(context) -> str:
+    # Resolved per request rather than at import, so a long-lived (pre-warmed)
+    # process does not keep answering with the time it was started.
+    return SYSTEM_PROMPT.format(current_datetime=get_current_datetime())
+
+
+# ──────────────────────────────────────────────────────────────
+# Callbacks (thin wrappers so their modules load on the first request)
+# ──────────────────────────────────────────────────────────────
+def compact_before_model(callback_context, llm_request):
+    from .compaction import compact_before_model as compact
+    return compact(callback_context, llm_request)
+
+def memo_before_tool(tool, args, tool_context):
+    from .tool_memo import memo_before_tool as before
+    return before(tool, args, tool_context)
+
+def memo_after_tool(tool, args, tool_context, tool_response):
+    from .tool_memo import memo_after_tool as after
+    return after(tool, args, tool_context, tool_response)
+
 
 # ──────────────────────────────────────────────────────────────
 # ADK Agent Registration
@@ -127,7 +270,11 @@ root_agent = Agent(
     model="gemini-2.5-flash",
     name="weather_air_quality_agent",
     description="Weather & Air Quality Assistant using MCP tools.",
-    instruction=SYSTEM_PROMPT,
+    instruction=build_instruction,
+    tools=[get_weather, get_air_quality, subscribe_alert, list_alerts, cancel_alert],
+    before_model_callback=compact_before_model,
+    before_tool_callback=memo_before_tool,
+    after_tool_callback=memo_after_tool,
 )
 
 # Optional local test entrypoint
@@ -0,0 +1,389 @@
+"""
+Proactive alert subscriptions ("warn me if wind exceeds 40 kph this weekend").
+
+Users register a condition on a location once; a background evaluator then
+fetches each subscribed location once per interval (through MCPServer, so
+the shared tool cache applies), and only re-evaluates that location's
+subscriptions when the forecast or air-quality series actually changed. All
+subscribers of a location share one fetch. Subscriptions live in SQLite
+(WEATHER_AGENT_ALERTS_PATH), so every serve.py worker sees the same ones
+and they survive restarts; a lease row elects the one worker that fetches. A subscription notifies its
+session once when its condition becomes true, and re-arms if it stops
+being true.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from .agent import unwrap_result
+
+log = logging.getLogger("weather_agent")
+
+ALERT_INTERVAL = float(os.getenv("WEATHER_AGENT_ALERT_INTERVAL", "300"))  # seconds
+ALERT_CONCURRENCY = 8
+
+# metric -> (source, field, unit)
+METRICS: Dict[str, Tuple[str, str, str]] = {
+    "wind_kph": ("weather", "wind_kph", "kph"),
+    "temp": ("weather", "temp", "°C"),
+    "precip_mm": ("weather", "precip_mm", "mm"),
+    "pm2_5": ("air_quality", "pm2_5", "µg/m³"),
+    "pm10": ("air_quality", "pm10", "µg/m³"),
+    "aqi": ("air_quality", "aqi", ""),
+}
+OPERATORS = (">", "<")
+
+
+@dataclass
+class Subscription:
+    id: str
+    app_name: str
+    user_id: str
+    session_id: str
+    location: str
+    metric: str
+    operator: str
+    threshold: float
+    start: Optional[str] = None  # YYYY-MM-DD, inclusive
+    end: Optional[str] = None
+    triggered: bool = False
+    evaluated: bool = False
+
+    def matches(self, value: float) -> bool:
+        return value > self.threshold if self.operator == ">" else value < self.threshold
+
+    def describe(self) -> str:
+        unit = METRICS[self.metric][2]
+        window = f" between {self.start or 'now'} and {self.end or 'the end of the forecast'}" if self.start or self.end else ""
+        return f"{self.metric} {self.operator} {self.threshold:g} {unit}".rstrip() + f" in {self.location}{window}"
+
+
+def _location_key(location: str) -> str:
+    return location.strip().lower()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_subscriptions (
+    id TEXT PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    location TEXT NOT NULL,
+    location_key TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    triggered INTEGER NOT NULL DEFAULT 0,
+    evaluated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS alert_subscriptions_location ON alert_subscriptions (location_key);
+CREATE INDEX IF NOT EXISTS alert_subscriptions_session ON alert_subscriptions (session_id);
+CREATE TABLE IF NOT EXISTS alert_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+# In Subscription field order
+COLUMNS = ("id, app_name, user_id, session_id, location, metric, operator, threshold,"
+           " start_date, end_date, triggered, evaluated")
+
+
+class AlertRegistry:
+    """Subscriptions in SQLite, indexed by location so one fetch serves every subscriber.
+
+    With a file path (WEATHER_AGENT_ALERTS_PATH) every worker process sees the
+    same subscriptions and they survive restarts; the default ":memory:" store
+    is private to the process. The store also holds the evaluator lease that
+    lets exactly one worker fetch and evaluate.
+    """
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "AlertRegistry":
+        return cls(os.getenv("WEATHER_AGENT_ALERTS_PATH", ":memory:"))
+
+    def _execute(self, sql: str, params: Tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _subscription(row: tuple) -> Subscription:
+        *fields, triggered, evaluated = row
+        return Subscription(*fields, triggered=bool(triggered), evaluated=bool(evaluated))
+
+    def subscribe(self, app_name: str, user_id: str, session_id: str, location: str, metric: str,
+                  operator: str, threshold: float, start: Optional[str] = None,
+                  end: Optional[str] = None) -> Subscription:
+        if metric not in METRICS:
+            raise ValueError(f"Invalid metric. Must be one of: {', '.join(METRICS)}")
+        if operator not in OPERATORS:
+            raise ValueError(f"Invalid operator. Must be one of: {', '.join(OPERATORS)}")
+        for value in (start, end):
+            if value:
+                date.fromisoformat(value)
+        sub = Subscription(uuid.uuid4().hex[:12], app_name, user_id, session_id, location.strip(),
+                           metric, operator, float(threshold), start or None, end or None)
+        self._execute(
+            "INSERT INTO alert_subscriptions (id, app_name, user_id, session_id, location, location_key,"
+            " metric, operator, threshold, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (sub.id, app_name, user_id, session_id, sub.location, _location_key(location),
+             metric, operator, sub.threshold, sub.start, sub.end),
+        )
+        return sub
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        return self._execute("DELETE FROM alert_subscriptions WHERE id = ?", (subscription_id,)) > 0
+
+    def for_session(self, session_id: str) -> List[Subscription]:
+        rows = self._query(f"SELECT {COLUMNS} FROM alert_subscriptions WHERE session_id = ?", (session_id,))
+        return [self._subscription(row) for row in rows]
+
+    def locations(self) -> Dict[str, List[Subscription]]:
+        by_location: Dict[str, List[Subscription]] = {}
+        for key, *row in self._query(f"SELECT location_key, {COLUMNS} FROM alert_subscriptions"):
+            by_location.setdefault(key, []).append(self._subscription(tuple(row)))
+        return by_location
+
+    def save_state(self, subs: List[Subscription]) -> None:
+        """Persist the triggered/evaluated flags set by evaluate()."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE alert_subscriptions SET triggered = ?, evaluated = ? WHERE id = ?",
+                [(int(s.triggered), int(s.evaluated), s.id) for s in subs],
+            )
+
+    def expire(self, today: str) -> int:
+        return self._execute(
+            "DELETE FROM alert_subscriptions WHERE end_date IS NOT NULL AND end_date < ?", (today,)
+        )
+
+    def acquire_lease(self, owner: str, ttl: float) -> bool:
+        """Take or renew the evaluator lease; False while another live owner holds it."""
+        now = time.time()
+        return self._execute(
+            "INSERT INTO alert_lease (id, owner, expires_at) VALUES (1, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+            " WHERE alert_lease.owner = excluded.owner OR alert_lease.expires_at < ?",
+            (owner, now + ttl, now),
+        ) > 0
+
+    def release_lease(self, owner: str) -> None:
+        self._execute("DELETE FROM alert_lease WHERE owner = ?", (owner,))
+
+    def location_count(self) -> int:
+        return self._query("SELECT COUNT(DISTINCT location_key) FROM alert_subscriptions")[0][0]
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM alert_subscriptions")[0][0]
+
+
+def _weather_series(weather: Dict[str, Any], field: str, start: Optional[str],
+                    end: Optional[str]) -> List[Tuple[str, float]]:
+    return [
+        (hour["time"], hour[field]) for hour in weather.get("hourly", [])
+        if hour.get(field) is not None
+        and (not start or hour["time"][:10] >= start) and (not end or hour["time"][:10] <= end)
+    ]
+
+
+def _air_quality_series(aq: Dict[str, Any], field: str) -> List[Tuple[str, float]]:
+    if field == "aqi":
+        value = aq.get("aqi")
+    else:
+        value = next((m.get("value") for m in aq.get("measurements", []) if m.get("parameter") == field), None)
+    return [] if value is None else [(aq.get("timestamp", ""), value)]
+
+
+def _series_digest(data: Dict[str, Any]) -> str:
+    """Digest of the values the metrics read.
+
+    Tool results also carry per-fetch metadata (e.g. `generated_at`), so
+    hashing the whole result would make every refetch look like a change."""
+    series: Dict[str, Any] = {}
+    weather = data.get("weather")
+    if weather is not None:
+        fields = sorted({field for source, field, _ in METRICS.values() if source == "weather"})
+        series["weather"] = [[hour.get("time")] + [hour.get(f) for f in fields] for hour in weather.get("hourly", [])]
+    aq = data.get("air_quality")
+    if aq is not None:
+        series["air_quality"] = [aq.get("aqi"), [[m.get("parameter"), m.get("value")] for m in aq.get("measurements", [])]]
+    return hashlib.sha1(json.dumps(series, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def evaluate(subs: List[Subscription], data: Dict[str, Any]) -> List[Tuple[Subscription, str, float]]:
+    """Return (subscription, time, value) for subscriptions whose condition just became true.
+
+    Subscriptions sharing a metric and window share one pass over the series;
+    each subscription then only compares its threshold with the series max/min.
+    """
+    groups: Dict[Tuple, List[Subscription]] = {}
+    for sub in subs:
+        groups.setdefault((sub.metric, sub.start, sub.end), []).append(sub)
+
+    fired = []
+    for (metric, start, end), group in groups.items():
+        source, field, _ = METRICS[metric]
+        if data.get(source) is None:
+            continue
+        if source == "weather":
+            series = _weather_series(data[source], field, start, end)
+        else:
+            series = _air_quality_series(data[source], field)
+        if not series:
+            continue
+        highest = max(value for _, value in series)
+        lowest = min(value for _, value in series)
+        for sub in group:
+            active = sub.matches(highest if sub.operator == ">" else lowest)
+            if active and not sub.triggered:
+                when, value = next((t, v) for t, v in series if sub.matches(v))
+                fired.append((sub, when, value))
+            sub.triggered = active
+            sub.evaluated = True
+    return fired
+
+
+def format_alert(sub: Subscription, when: str, value: float) -> str:
+    unit = METRICS[sub.metric][2]
+    return (f"⚠️ Alert: {sub.metric} in {sub.location} is forecast to reach {value:g} {unit}".rstrip()
+            + f" at {when} (your condition: {sub.describe()}).")
+
+
+Notifier = Callable[[Subscription, str], Awaitable[None]]
+
+
+class AlertEvaluator:
+    """Fetches subscribed locations and notifies sessions when alerts fire."""
+    def __init__(self, registry: AlertRegistry, mcp, notify: Notifier,
+                 interval: float = ALERT_INTERVAL, concurrency: int = ALERT_CONCURRENCY):
+        self.registry = registry
+        self.mcp = mcp
+        self.notify = notify
+        self.interval = interval
+        self.concurrency = concurrency
+        # Renewed every tick; another worker takes over if this one stops renewing
+        self.lease_ttl = interval * 3
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        self._digests: Dict[str, str] = {}
+        self.stats = {"fetches": 0, "evaluations": 0, "skipped_unchanged": 0, "notifications": 0}
+
+    async def _fetch(self, location: str, sources: set) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if "weather" in sources:
+            data["weather"] = unwrap_result(await self.mcp.get_weather(location, None, None))
+            self.stats["fetches"] += 1
+        if "air_quality" in sources:
+            data["air_quality"] = unwrap_result(await self.mcp.get_air_quality(location))
+            self.stats["fetches"] += 1
+        return data
+
+    async def _check_location(self, key: str, subs: List[Subscription], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                data = await self._fetch(subs[0].location, {METRICS[s.metric][0] for s in subs})
+            except Exception as e:
+                log.warning("Alert fetch failed for %s: %s", subs[0].location, e)
+                return
+        digest = _series_digest(data)
+        if self._digests.get(key) == digest:
+            # Data unchanged: only subscriptions added since the last pass need a look
+            subs = [s for s in subs if not s.evaluated]
+            if not subs:
+                self.stats["skipped_unchanged"] += 1
+                return
+        self._digests[key] = digest
+        self.stats["evaluations"] += 1
+        fired = evaluate(subs, data)
+        self.registry.save_state(subs)
+        for sub, when, value in fired:
+            await self.notify(sub, format_alert(sub, when, value))
+            self.stats["notifications"] += 1
+
+    async def tick(self) -> None:
+        self.registry.expire(date.today().isoformat())
+        locations = self.registry.locations()
+        for key in set(self._digests) - set(locations):
+            del self._digests[key]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._check_location(k, subs, semaphore) for k, subs in locations.items()))
+
+    async def run(self) -> None:
+        """Evaluate every interval while holding the lease, so one worker fetches for all."""
+        try:
+            while True:
+                try:
+                    self.leader = self.registry.acquire_lease(self.owner, self.lease_ttl)
+                    if self.leader:
+                        await self.tick()
+                    else:
+                        # Another worker evaluates; re-evaluate everything if we take over
+                        self._digests.clear()
+                except Exception as e:
+                    log.warning("Alert evaluation failed: %s", e)
+                await asyncio.sleep(self.interval)
+        finally:
+            if self.leader:
+                self.registry.release_lease(self.owner)
+
+
+class SessionNotifier:
+    """Delivers alerts as agent messages appended to the subscriber's ADK session."""
+    def __init__(self, session_service, author: str):
+        self.session_service = session_service
+        self.author = author
+
+    async def __call__(self, sub: Subscription, message: str) -> None:
+        from google.adk.events import Event
+        from google.genai import types
+
+        session = await self.session_service.get_session(
+            app_name=sub.app_name, user_id=sub.user_id, session_id=sub.session_id
+        )
+        if session is None:
+            return
+        event = Event(author=self.author, content=types.Content(role="model", parts=[types.Part(text=message)]))
+        await self.session_service.append_event(session, event)
+
+
+REGISTRY = AlertRegistry.from_env()
+_evaluator: Optional[AlertEvaluator] = None
+_evaluator_task: Optional[asyncio.Task] = None
+
+
+def ensure_evaluator(mcp, notify: Notifier) -> None:
+    """Start the background evaluator on the running loop if it is not running yet."""
+    global _evaluator, _evaluator_task
+    if _evaluator_task is None or _evaluator_task.done():
+        _evaluator = AlertEvaluator(REGISTRY, mcp, notify)
+        _evaluator_task = asyncio.get_running_loop().create_task(_evaluator.run())
+
+
+def alert_stats() -> Dict[str, Any]:
+    stats = {"subscriptions": len(REGISTRY), "locations": REGISTRY.location_count()}
+    if _evaluator is not None:
+        stats.update(_evaluator.stats, leader=_evaluator.leader)
+    return stats
@@ -0,0 +1,276 @@
+"""
+Headless bulk export of forecasts and air quality for a list of cities.
+
+Fetches through MCPServer (so the MCP server's validation, retries and the
+shared tool cache all apply) with bounded concurrency and writes each batch
+of cities (--batch-size, default 200) as one part file per dataset:
+
+    <out>/weather_daily/part-<run>-<n>.csv|parquet
+    <out>/weather_hourly/part-<run>-<n>.csv|parquet
+    <out>/air_quality/part-<run>-<n>.csv|parquet
+    <out>/_completed.txt        # cities already exported (used to resume)
+
+A whole run usually fits in one part per dataset; read a dataset directory
+with e.g. pyarrow.dataset or pandas. Only one batch of rows is held in
+memory. A batch's cities are added to _completed.txt once its parts are
+written, so re-running the same command after an interruption skips them.
+
+Usage:
+    python -m weather_agent.bulk_export cities.txt --out exports/2025-01-15 --format parquet
+    python -m weather_agent.bulk_export "Kathmandu,London" --out exports/today --format csv
+
+Schedule it with cron, e.g. `0 6 * * * python -m weather_agent.bulk_export ...`.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from datetime import date, datetime
+from typing import Dict, Any, List, Tuple, Iterator, Iterable, AsyncIterator, Optional
+
+from .agent import unwrap_result
+
+log = logging.getLogger("weather_agent")
+
+# Column name -> type, in file order. Types: string, float, int, date, timestamp.
+SCHEMAS: Dict[str, List[Tuple[str, str]]] = {
+    "weather_daily": [
+        ("city", "string"), ("date", "date"), ("tmin", "float"), ("tmax", "float"),
+        ("precip_mm", "float"), ("generated_at", "timestamp"),
+    ],
+    "weather_hourly": [
+        ("city", "string"), ("time", "timestamp"), ("temp", "float"),
+        ("precip_mm", "float"), ("wind_kph", "float"),
+    ],
+    "air_quality": [
+        ("city", "string"), ("timestamp", "timestamp"), ("aqi", "int"), ("aqi_meaning", "string"),
+        ("pm2_5", "float"), ("pm10", "float"),
+    ],
+}
+MANIFEST = "_completed.txt"
+BATCH_SIZE = 200  # cities per part file
+
+
+# ──────────────────────────────────────────────────────────────
+# Row generators
+# ──────────────────────────────────────────────────────────────
+def weather_daily_rows(city: str, weather: Dict[str, Any]) -> Iterator[tuple]:
+    for day in weather.get("daily", []):
+        yield (city, day.get("date"), day.get("tmin"), day.get("tmax"),
+               day.get("precip_mm"), weather.get("generated_at"))
+
+
+def weather_hourly_rows(city: str, weather: Dict[str, Any]) -> Iterator[tuple]:
+    for hour in weather.get("hourly", []):
+        yield (city, hour.get("time"), hour.get("temp"), hour.get("precip_mm"), hour.get("wind_kph"))
+
+
+def air_quality_rows(city: str, aq: Dict[str, Any]) -> Iterator[tuple]:
+    values = {m.get("parameter"): m.get("value") for m in aq.get("measurements", [])}
+    yield (city, aq.get("timestamp"), aq.get("aqi"), aq.get("aqi_meaning"),
+           values.get("pm2_5"), values.get("pm10"))
+
+
+ROW_BUILDERS = {
+    "weather_daily": lambda city, weather, aq: weather_daily_rows(city, weather),
+    "weather_hourly": lambda city, weather, aq: weather_hourly_rows(city, weather),
+    "air_quality": lambda city, weather, aq: air_quality_rows(city, aq),
+}
+
+
+# ──────────────────────────────────────────────────────────────
+# Writers
+# ──────────────────────────────────────────────────────────────
+def _cast(value: Any, kind: str) -> Any:
+    if value is None or value == "":
+        return None
+    if kind == "float":
+        return float(value)
+    if kind == "int":
+        return int(value)
+    if kind == "date":
+        return date.fromisoformat(value)
+    if kind == "timestamp":
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return str(value)
+
+
+def _typed_rows(schema: List[Tuple[str, str]], rows: Iterable[tuple]) -> Iterator[list]:
+    kinds = [kind for _, kind in schema]
+    for row in rows:
+        yield [_cast(value, kind) for value, kind in zip(row, kinds)]
+
+
+def write_csv(path: str, schema: List[Tuple[str, str]], rows: Iterable[list]) -> None:
+    """Write rows already converted by _typed_rows."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in schema])
+        for row in rows:
+            writer.writerow(["" if v is None else v.isoformat() if hasattr(v, "isoformat") else v
+                             for v in row])
+
+
+def write_parquet(path: str, schema: List[Tuple[str, str]], rows: Iterable[list]) -> None:
+    """Write rows already converted by _typed_rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"string": pa.string(), "float": pa.float64(), "int": pa.int32(),
+             "date": pa.date32(), "timestamp": pa.timestamp("ms", tz="UTC")}
+    columns: List[list] = [[] for _ in schema]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+    table = pa.Table.from_arrays(
+        [pa.array(col, type=types[kind]) for col, (_, kind) in zip(columns, schema)],
+        names=[name for name, _ in schema],
+    )
+    pq.write_table(table, path, compression="zstd")
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+# ──────────────────────────────────────────────────────────────
+# Pipeline
+# ──────────────────────────────────────────────────────────────
+async def fetch_cities(mcp, cities: Iterable[str], concurrency: int,
+                       start: Optional[str] = None, end: Optional[str] = None
+                       ) -> AsyncIterator[Tuple[str, Any, Any]]:
+    """Yield (city, weather | error, air_quality | error) as cities complete.
+
+    `concurrency` workers pull cities lazily and hand results over a queue of
+    the same size, so at most 2 × concurrency cities are held in memory."""
+    pending = iter(cities)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    done = object()
+
+    async def worker():
+        for city in pending:
+            weather, aq = await asyncio.gather(
+                mcp.get_weather(city, start, end), mcp.get_air_quality(city), return_exceptions=True
+            )
+            await queue.put((city, weather, aq))
+        await queue.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    finished = 0
+    try:
+        while finished < len(workers):
+            item = await queue.get()
+            if item is done:
+                finished += 1
+            else:
+                yield item
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def load_completed(out_dir: str) -> set:
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def _city_rows(city: str, weather: Any, aq: Any) -> Dict[str, List[list]]:
+    """Typed rows of every dataset for one city; raises if the city failed."""
+    for result in (weather, aq):
+        if isinstance(result, Exception):
+            raise result
+    weather, aq = unwrap_result(weather), unwrap_result(aq)
+    return {dataset: list(_typed_rows(schema, ROW_BUILDERS[dataset](city, weather, aq)))
+            for dataset, schema in SCHEMAS.items()}
+
+
+async def export(mcp, cities: List[str], out_dir: str, fmt: str = "csv", concurrency: int = 4,
+                 start: Optional[str] = None, end: Optional[str] = None,
+                 batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Export every city not yet in the manifest; returns counts of exported/skipped/failed."""
+    write = WRITERS[fmt]
+    for dataset in SCHEMAS:
+        os.makedirs(os.path.join(out_dir, dataset), exist_ok=True)
+    completed = load_completed(out_dir)
+    unique = list(dict.fromkeys(cities))
+    todo = [c for c in unique if c not in completed]
+    counts = {"exported": 0, "skipped": len(unique) - len(todo), "failed": 0}
+    run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    batch: Dict[str, List[list]] = {dataset: [] for dataset in SCHEMAS}
+    batch_cities: List[str] = []
+    parts = 0
+
+    def flush(manifest):
+        nonlocal parts
+        parts += 1
+        for dataset, schema in SCHEMAS.items():
+            path = os.path.join(out_dir, dataset, f"part-{run_id}-{parts}.{fmt}")
+            # Write to a temp file and rename so a crash never leaves a half-written part.
+            write(path + ".tmp", schema, batch[dataset])
+            os.replace(path + ".tmp", path)
+            batch[dataset] = []
+        manifest.write("".join(city + "\n" for city in batch_cities))
+        manifest.flush()
+        counts["exported"] += len(batch_cities)
+        batch_cities.clear()
+
+    with open(os.path.join(out_dir, MANIFEST), "a", encoding="utf-8") as manifest:
+        async for city, weather, aq in fetch_cities(mcp, todo, concurrency, start, end):
+            try:
+                rows = _city_rows(city, weather, aq)
+            except Exception as e:
+                # Fetch errors, unparseable error envelopes and bad values only fail this city
+                counts["failed"] += 1
+                log.warning("Export failed for %s: %s", city, e)
+                continue
+            for dataset, dataset_rows in rows.items():
+                batch[dataset].extend(dataset_rows)
+            batch_cities.append(city)
+            if len(batch_cities) >= batch_size:
+                flush(manifest)
+        if batch_cities:
+            flush(manifest)
+    return counts
+
+
+def read_cities(source: str) -> List[str]:
+    if os.path.exists(source):
+        with open(source, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [c.strip() for c in source.split(",") if c.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export forecasts and air quality for many cities.")
+    parser.add_argument("cities", help="File with one city per line, or a comma-separated list")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Cities per part file")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD), default: today")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD), default: +6 days")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("ERROR: pyarrow not installed. Install it with: pip install pyarrow")
+            return 1
+
+    from .agent import MCPServer
+    counts = asyncio.run(export(MCPServer(), read_cities(args.cities), args.out,
+                                args.format, args.concurrency, args.start, args.end, args.batch_size))
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+History compaction for long conversations.
+
+ADK resends the whole session history to Gemini on every turn, so a
+follow-up like "What about tomorrow?" gets more expensive the longer the
+chat runs. compact_before_model() keeps only the most recent turns within a
+token budget and replaces everything older with a short resolved-context note
+(last location, dates and tool results). That context is kept in session
+state, so it survives restarts when sessions are stored in SQLite.
+"""
+import os
+import json
+from typing import Dict, Any, List, Optional
+
+MAX_HISTORY_TOKENS = int(os.getenv("WEATHER_AGENT_HISTORY_TOKENS", "2000"))
+KEEP_TURNS = int(os.getenv("WEATHER_AGENT_HISTORY_TURNS", "3"))
+CONTEXT_STATE_KEY = "resolved_context"
+
+
+def _part_size(part) -> int:
+    if getattr(part, "text", None):
+        return len(part.text)
+    call = getattr(part, "function_call", None)
+    if call is not None:
+        return len(call.name or "") + len(json.dumps(call.args or {}, default=str))
+    response = getattr(part, "function_response", None)
+    if response is not None:
+        return len(json.dumps(response.response or {}, default=str))
+    return 0
+
+
+def estimate_tokens(contents) -> int:
+    """Rough token count (~4 characters per token), good enough for a budget."""
+    return sum(_part_size(p) for c in contents for p in (c.parts or [])) // 4
+
+
+def split_turns(contents) -> List[list]:
+    """Group contents into turns, each starting at a user text message."""
+    turns: List[list] = []
+    for content in contents:
+        starts_turn = content.role == "user" and any(getattr(p, "text", None) for p in content.parts or [])
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _summarize_result(name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    # Hourly series are the bulk of a forecast; the daily rows and AQI are
+    # what follow-up questions actually refer back to.
+    if name == "get_weather":
+        return {"daily": result.get("daily", [])}
+    if name == "get_air_quality":
+        keep = ("aqi", "aqi_meaning", "measurements", "timestamp")
+        return {k: result[k] for k in keep if k in result}
+    return result
+
+
+def resolve_context(contents, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Collect the latest location, dates and tool results mentioned in contents."""
+    context = dict(previous or {})
+    results = dict(context.get("last_results", {}))
+    for content in contents:
+        for part in content.parts or []:
+            call = getattr(part, "function_call", None)
+            if call is not None and call.args:
+                if call.args.get("location"):
+                    context["location"] = call.args["location"]
+                # A forecast call's date range is one unit: a newer call without
+                # `end` must not be paired with an older call's `end`.
+                if call.name == "get_weather":
+                    for key in ("start", "end"):
+                        if call.args.get(key):
+                            context[key] = call.args[key]
+                        else:
+                            context.pop(key, None)
+            response = getattr(part, "function_response", None)
+            if response is not None and isinstance(response.response, dict):
+                results[response.name] = _summarize_result(response.name, response.response)
+    if results:
+        context["last_results"] = results
+    return context
+
+
+def format_context(context: Dict[str, Any]) -> str:
+    lines = ["Resolved context from earlier in this conversation:"]
+    if context.get("location"):
+        lines.append(f"- Location: {context['location']}")
+    if context.get("start") or context.get("end"):
+        lines.append(f"- Dates: {context.get('start') or '?'} to {context.get('end') or '?'}")
+    for name, result in context.get("last_results", {}).items():
+        lines.append(f"- Last {name} result: {json.dumps(result, default=str)}")
+    return "\n".join(lines)
+
+
+def compact_history(contents, previous: Optional[Dict[str, Any]] = None,
+                    max_tokens: int = MAX_HISTORY_TOKENS, keep_turns: int = KEEP_TURNS):
+    """Return (kept_contents, context) with older turns folded into context.
+
+    The current turn is always kept; earlier turns are kept newest-first while
+    they fit in max_tokens and at most keep_turns turns are kept overall.
+    """
+    # Turns folded on an earlier call are already in `previous`; they stay
+    # folded and are not rescanned, so the cost per turn does not grow.
+    folded = (previous or {}).get("folded_turns", 0)
+    turns = split_turns(contents)
+    kept = [turns.pop()] if turns else []
+    while len(turns) > folded and len(kept) < keep_turns:
+        candidate = turns[-1]
+        if estimate_tokens([c for t in [candidate] + kept for c in t]) > max_tokens:
+            break
+        kept.insert(0, turns.pop())
+    context = resolve_context([c for t in turns[folded:] for c in t], previous)
+    context["folded_turns"] = max(folded, len(turns))
+    return [c for t in kept for c in t], context
+
+
+def compact_before_model(callback_context, llm_request):
+    """ADK before_model_callback: cap the history sent to the model."""
+    from google.genai import types
+
+    previous = callback_context.state.get(CONTEXT_STATE_KEY)
+    kept, context = compact_history(llm_request.contents, previous)
+    if not context["folded_turns"]:
+        return None
+
+    callback_context.state[CONTEXT_STATE_KEY] = context
+    if kept:
+        first = kept[0]
+        note = types.Part(text=format_context(context))
+        kept[0] = types.Content(role=first.role, parts=[note] + list(first.parts or []))
+    llm_request.contents = kept
+    return None
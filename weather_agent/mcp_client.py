@@ -0,0 +1,124 @@
+"""
+Minimal synchronous MCP client for mcp-server/index.js.
+
+Spawns the Node server once and speaks MCP (newline-delimited JSON-RPC 2.0)
+over its stdin/stdout. MCPServer calls tools from asyncio.to_thread workers,
+so requests from several threads may be in flight at once: writes are
+serialized by a lock and a reader thread hands each response to the thread
+waiting for its id.
+"""
+import os
+import json
+import shutil
+import itertools
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "mcp-server"))
+PROTOCOL_VERSION = "2024-11-05"
+DEFAULT_TIMEOUT = 60  # seconds; the server retries upstream calls with 10s timeouts
+
+
+class MCPError(RuntimeError):
+    """Error returned by the MCP server (validation, unknown location, upstream failure)."""
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.message: Optional[Dict[str, Any]] = None
+
+
+class MCPClient:
+    def __init__(self, command: Optional[List[str]] = None, cwd: str = SERVER_DIR,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.command = command or [shutil.which("node") or "node", os.path.join(SERVER_DIR, "index.js")]
+        self.cwd = cwd
+        self.timeout = timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: Dict[int, _Pending] = {}
+        self._ids = itertools.count(1)
+
+    def start(self) -> None:
+        """Spawn the server and complete the MCP handshake (no-op if running)."""
+        with self._start_lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return
+            proc = subprocess.Popen(
+                self.command, cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                text=True, encoding="utf-8", bufsize=1,
+            )
+            threading.Thread(target=self._read_loop, args=(proc,), daemon=True).start()
+            self._proc = proc
+            try:
+                self._request("initialize", {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "weather_agent", "version": "1.0.0"},
+                })
+                self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            except MCPError:
+                # Respawn on the next call rather than reuse a half-initialized server
+                proc.kill()
+                self._proc = None
+                raise
+
+    def call_tool(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool and return its raw MCP result ({"content": [...]})."""
+        self.start()
+        arguments = {k: v for k, v in args.items() if v is not None}
+        result = self._request("tools/call", {"name": name, "arguments": arguments})
+        if result.get("isError"):
+            raise MCPError(" ".join(c.get("text", "") for c in result.get("content", [])) or "Tool error")
+        return result
+
+    def close(self) -> None:
+        with self._start_lock:
+            if self._proc is not None:
+                self._proc.terminate()
+                self._proc = None
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        with self._write_lock:
+            proc = self._proc
+            if proc is None or proc.poll() is not None:
+                raise MCPError("MCP server exited")
+            try:
+                proc.stdin.write(json.dumps(message) + "\n")
+                proc.stdin.flush()
+            except OSError as e:
+                raise MCPError(f"MCP server exited: {e}") from e
+
+    def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        pending = self._pending[request_id] = _Pending()
+        try:
+            self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            if not pending.done.wait(self.timeout):
+                raise MCPError(f"MCP request {method} timed out after {self.timeout:g}s")
+        finally:
+            self._pending.pop(request_id, None)
+        message = pending.message
+        if "error" in message:
+            raise MCPError(message["error"].get("message", "MCP error"))
+        return message.get("result", {})
+
+    def _read_loop(self, proc: subprocess.Popen) -> None:
+        for line in proc.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # not protocol output
+            if not isinstance(message, dict):
+                continue
+            pending = self._pending.get(message.get("id"))
+            if pending is not None and ("result" in message or "error" in message):
+                pending.message = message
+                pending.done.set()
+        # Server exited: fail everything still waiting instead of hanging until the timeout
+        for pending in list(self._pending.values()):
+            pending.message = {"error": {"message": "MCP server exited"}}
+            pending.done.set()
@@ -0,0 +1,61 @@
+"""
+Profiling mode for MCPServer tool calls (enabled by WEATHER_AGENT_PROFILE_DIR).
+
+Each tool call made through MCPServer is run under cProfile and tracemalloc.
+The call's CPU profile is written to <dir>/<tool>-<pid>-<n>.pstats and its
+timing and allocation stats are logged to stderr as JSON. Convert the
+profiles with `python flamegraph.py <dir>`.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+import itertools
+import tracemalloc
+from typing import Any, Callable, Optional
+
+
+class ToolProfiler:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._seq = itertools.count(1)
+        # Only one cProfile profiler can be active at a time (enforced on
+        # Python 3.12+), so overlapping calls are timed but not profiled.
+        self._lock = threading.Lock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolProfiler"]:
+        directory = os.getenv("WEATHER_AGENT_PROFILE_DIR")
+        return cls(directory) if directory else None
+
+    def run(self, tool: str, fn: Callable[..., Any], *args: Any) -> Any:
+        profiled = self._lock.acquire(blocking=False)
+        profile = cProfile.Profile() if profiled else None
+        if profiled:
+            tracemalloc.reset_peak()
+        start_alloc, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            if profile is None:
+                return fn(*args)
+            profile.enable()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            current, peak = tracemalloc.get_traced_memory()
+            stats = {"total_ms": round(elapsed_ms, 3), "alloc_delta_bytes": current - start_alloc}
+            if profile is not None:
+                stats["alloc_peak_bytes"] = peak - start_alloc
+                path = os.path.join(self.directory, f"{tool}-{os.getpid()}-{next(self._seq)}.pstats")
+                profile.dump_stats(path)
+                stats["pstats"] = path
+                self._lock.release()
+            print(json.dumps({"tool": tool, "profile": stats}), file=sys.stderr)
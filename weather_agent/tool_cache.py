@@ -0,0 +1,90 @@
+"""
+Shared tool-result cache for multi-worker deployments.
+
+Every agent worker spawns its own Node MCP server, and each of those keeps a
+private in-memory cache. When WEATHER_AGENT_CACHE_PATH is set, MCPServer
+checks this SQLite-backed cache first, so N workers on one box share a single
+copy of every forecast and air-quality result instead of N copies.
+"""
+import os
+import json
+import time
+import sqlite3
+import itertools
+import threading
+from typing import Dict, Any, Optional
+
+DEFAULT_TTL = 300  # seconds, same as CACHE_TTL in mcp-server/index.js
+# Keys include dates, so stale rows never get overwritten; sweep them every N writes.
+PURGE_EVERY = 100
+
+
+class SharedToolCache:
+    """TTL cache of tool results stored in a SQLite file (WAL mode)."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, purge_every: int = PURGE_EVERY):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = itertools.count(1)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedToolCache"]:
+        """Build the cache from WEATHER_AGENT_CACHE_PATH, or return None if unset."""
+        path = os.getenv("WEATHER_AGENT_CACHE_PATH")
+        if not path:
+            return None
+        ttl = float(os.getenv("WEATHER_AGENT_CACHE_TTL", DEFAULT_TTL))
+        return cls(path, ttl)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, and tool calls
+        # run in asyncio.to_thread workers, so keep one connection per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(tool: str, args: Dict[str, Any]) -> str:
+        return f"{tool}:{json.dumps(args, sort_keys=True)}"
+
+    def get(self, tool: str, args: Dict[str, Any]) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value, stored_at FROM tool_cache WHERE key = ?",
+            (self.make_key(tool, args),),
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        if time.time() - stored_at > self.ttl:
+            return None
+        return json.loads(value)
+
+    def set(self, tool: str, args: Dict[str, Any], value: Any) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO tool_cache (key, value, stored_at) VALUES (?, ?, ?)",
+            (self.make_key(tool, args), json.dumps(value), time.time()),
+        )
+        if next(self._writes) % self.purge_every == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM tool_cache WHERE stored_at < ?", (time.time() - self.ttl,)
+        )
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
@@ -0,0 +1,120 @@
+"""
+Per-session tool-call dedup.
+
+The spec asks the agent to avoid repeating identical tool calls within 60
+seconds; the prompt alone does not stop Gemini from calling get_weather again
+with the same arguments on a follow-up. These ADK tool callbacks answer such
+repeats from a per-session memo and count how many calls were suppressed.
+"""
+import os
+import json
+import time
+import heapq
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+log = logging.getLogger("weather_agent")
+
+DEDUP_WINDOW = float(os.getenv("WEATHER_AGENT_DEDUP_WINDOW", "60"))  # seconds
+# Only data fetches are memoized; alert management tools change state.
+MEMO_TOOLS = {"get_weather", "get_air_quality"}
+MAX_SESSIONS = 10000
+TOP_SESSIONS = 5  # per-session counts reported by stats()
+
+
+class ToolCallMemo:
+    """Recent tool results keyed by (session, tool, args), expiring after `window` seconds."""
+    def __init__(self, window: float = DEDUP_WINDOW, max_sessions: int = MAX_SESSIONS):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Tuple[float, Any]]]" = OrderedDict()
+        self.suppressed = 0
+        self.suppressed_by_session: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(tool: str, args: Dict[str, Any]) -> str:
+        # "start": "" and a missing "start" mean the same call
+        normalized = {
+            k: v.strip() if isinstance(v, str) else v
+            for k, v in args.items() if v not in (None, "")
+        }
+        return f"{tool}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+    def _session(self, session_id: str) -> Dict[str, Tuple[float, Any]]:
+        entries = self._sessions.get(session_id)
+        if entries is None:
+            entries = self._sessions[session_id] = {}
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self.suppressed_by_session.pop(evicted, None)
+        else:
+            self._sessions.move_to_end(session_id)
+        return entries
+
+    def lookup(self, session_id: str, tool: str, args: Dict[str, Any]) -> Optional[Any]:
+        entries = self._session(session_id)
+        key = self.make_key(tool, args)
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.window:
+            del entries[key]
+            return None
+        self.suppressed += 1
+        self.suppressed_by_session[session_id] = self.suppressed_by_session.get(session_id, 0) + 1
+        return result
+
+    def record(self, session_id: str, tool: str, args: Dict[str, Any], result: Any) -> None:
+        entries = self._session(session_id)
+        now = time.monotonic()
+        for expired in [k for k, (t, _) in entries.items() if now - t > self.window]:
+            del entries[expired]
+        key = self.make_key(tool, args)
+        # A result served from the memo must not restart its own window,
+        # otherwise frequent repeats would keep a stale result alive forever.
+        if key in entries and entries[key][1] is result:
+            return
+        entries[key] = (now, result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_s": self.window,
+            "sessions": len(self._sessions),
+            "suppressed_calls": self.suppressed,
+            "sessions_with_suppressed_calls": len(self.suppressed_by_session),
+            # /health is unauthenticated and session ids are ADK URL keys, so only hashes
+            "top_sessions": {
+                hashlib.sha256(session_id.encode()).hexdigest()[:12]: count
+                for session_id, count in heapq.nlargest(
+                    TOP_SESSIONS, self.suppressed_by_session.items(), key=lambda item: item[1]
+                )
+            },
+        }
+
+
+MEMO = ToolCallMemo()
+
+
+def _session_id(tool_context) -> str:
+    return tool_context.session.id
+
+
+def memo_before_tool(tool, args, tool_context):
+    """ADK before_tool_callback: answer a repeated call from the memo."""
+    if tool.name not in MEMO_TOOLS:
+        return None
+    result = MEMO.lookup(_session_id(tool_context), tool.name, args)
+    if result is not None:
+        log.info("Suppressed repeated %s call %s (total suppressed: %d)", tool.name, args, MEMO.suppressed)
+    return result
+
+
+def memo_after_tool(tool, args, tool_context, tool_response):
+    """ADK after_tool_callback: remember the result for the dedup window."""
+    if tool.name not in MEMO_TOOLS:
+        return None
+    MEMO.record(_session_id(tool_context), tool.name, args, tool_response)
+    return None
@@ -0,0 +1,111 @@
+"""
+Warm startup for the agent process.
+
+A cold worker imports google.adk and the agent lazily on the first request,
+spawns the Node MCP server on the first tool call and starts with empty
+geocode/forecast caches. warm_up() does all of that up front for the cities
+in WEATHER_AGENT_WARM_CITIES and records how long each phase took; STATE.ready
+only becomes True once it has finished, which is what /health reports. If the
+MCP session cannot be started the state becomes "failed" instead.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+log = logging.getLogger("weather_agent")
+
+DEFAULT_WARM_CITIES = "Kathmandu"
+
+
+def configured_cities() -> List[str]:
+    raw = os.getenv("WEATHER_AGENT_WARM_CITIES", DEFAULT_WARM_CITIES)
+    return [city.strip() for city in raw.split(",") if city.strip()]
+
+
+class StartupState:
+    """Readiness flag plus per-phase startup timings (milliseconds)."""
+    def __init__(self):
+        self.ready = False
+        self.failed = False
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "failed" if self.failed else "warming",
+            "phases_ms": self.phases,
+            "total_ms": round(sum(self.phases.values()), 1),
+            "errors": self.errors,
+        }
+
+
+STATE = StartupState()
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def record_import(state: StartupState, start: float) -> None:
+    """Record the import phase measured from `start` (taken before importing the agent)."""
+    state.phases["import"] = _elapsed_ms(start)
+
+
+async def _timed_phase(state: StartupState, name: str, calls: Dict[str, Any]) -> None:
+    """Run the phase's calls concurrently; failures are recorded, not fatal."""
+    start = time.perf_counter()
+    results = await asyncio.gather(*calls.values(), return_exceptions=True)
+    state.phases[name] = _elapsed_ms(start)
+    for label, result in zip(calls, results):
+        if isinstance(result, Exception):
+            state.errors[f"{name}:{label}"] = str(result)
+            log.warning("Warm-up %s failed for %s: %s", name, label, result)
+
+
+async def warm_up(mcp=None, cities: Optional[List[str]] = None,
+                  state: StartupState = STATE) -> StartupState:
+    """Preload the agent, start the MCP session and prefetch forecasts."""
+    cities = configured_cities() if cities is None else cities
+
+    phase = "import"
+    try:
+        start = time.perf_counter()
+        from . import agent
+        # Importing this module already loaded the package (and the agent), so
+        # this is ~0 unless the caller measured the import itself (serve.py).
+        state.phases.setdefault("import", _elapsed_ms(start))
+
+        phase = "mcp_session"
+        start = time.perf_counter()
+        if mcp is None:
+            mcp = await asyncio.to_thread(agent.get_mcp_server)
+        await mcp.start()
+        state.phases["mcp_session"] = _elapsed_ms(start)
+    except Exception as e:
+        # Without the MCP session no tool call can work; report it instead of warming forever.
+        state.failed = True
+        state.errors[phase] = str(e)
+        log.error("Warm-up failed in %s phase: %s", phase, e)
+        print(json.dumps({"event": "startup", "cities": cities, **state.as_dict()}), file=sys.stderr)
+        return state
+
+    # The first call per city also fills the MCP server's geocode cache,
+    # so the forecast phase below only pays for the forecast fetch.
+    await _timed_phase(state, "air_quality", {
+        city: mcp.get_air_quality(city) for city in cities
+    })
+
+    today = date.today()
+    days = [today.isoformat(), (today + timedelta(days=1)).isoformat()]
+    await _timed_phase(state, "forecast", {
+        f"{city}@{day}": mcp.get_weather(city, day, day) for city in cities for day in days
+    })
+
+    state.ready = True
+    print(json.dumps({"event": "startup", "cities": cities, **state.as_dict()}), file=sys.stderr)
+    return state